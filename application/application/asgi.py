@@ -3,6 +3,9 @@ ASGI config for application project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The deployment profiles for uvicorn and hypercorn are described in
+deploy/README.md.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 """
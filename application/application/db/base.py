@@ -0,0 +1,116 @@
+"""PostgreSQL backend which takes connections from a psycopg_pool pool.
+
+The pool is configured by DATABASES[alias]['OPTIONS']['pool'], a dict of
+psycopg_pool.ConnectionPool arguments (min_size, max_size, timeout,
+max_idle, max_lifetime, ...) plus ``health_check``: check a connection
+with ``SELECT 1`` when it is taken from the pool. Django "closes" the
+connection at the end of every request, which returns it to the pool.
+"""
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+from django.utils.asyncio import async_unsafe
+
+from .creation import DatabaseCreation
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    # Pools are shared by the connections of all threads and async contexts
+    # of the process. The database name is a part of the key because the test
+    # runner changes it.
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool_options(self) -> dict:
+        return dict(self.settings_dict['OPTIONS'].get('pool') or {})
+
+    @property
+    def pool(self):
+        key = (self.alias, self.settings_dict['NAME'])
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._pools_lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = self._pools[key] = self._create_pool()
+        return pool
+
+    def close_pool(self) -> None:
+        """Close the connection and the pool of the current database, with all its idle connections."""
+        self.close()
+        with self._pools_lock:
+            pool = self._pools.pop((self.alias, self.settings_dict['NAME']), None)
+        if pool is not None:
+            pool.close()
+
+    def _create_pool(self):
+        if not is_psycopg3:
+            raise ImproperlyConfigured('Connection pooling requires psycopg 3.')
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured('Connection pooling requires CONN_MAX_AGE = 0, '
+                                       'connections are kept open by the pool.')
+        from psycopg_pool import ConnectionPool
+
+        options = self.pool_options
+        options.pop('health_check', None)
+        options.setdefault('name', self.alias)
+        return ConnectionPool(kwargs=self.get_connection_params(), open=True, **options)
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def _get_pooled_connection(self):
+        connection = self.pool.getconn()
+        if not self.pool_options.get('health_check'):
+            return connection
+        try:
+            # Outside of a transaction, which would prevent Django from setting
+            # the autocommit mode of the connection.
+            connection.autocommit = True
+            connection.execute('SELECT 1')
+        except self.Database.Error:
+            # The pool discards broken connections returned to it.
+            self.pool.putconn(connection)
+            connection = self.pool.getconn()
+        return connection
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        # The same as the base class does for a new connection.
+        isolation_level_value = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            self.isolation_level = IsolationLevel(isolation_level_value
+                                                  if isolation_level_value is not None
+                                                  else IsolationLevel.READ_COMMITTED)
+        except ValueError:
+            raise ImproperlyConfigured(
+                f'Invalid transaction isolation level {isolation_level_value} '
+                f'specified. Use one of the psycopg.IsolationLevel values.'
+            )
+        connection = self._get_pooled_connection()
+        if isolation_level_value is not None:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
+            self.connection = None
+
+
+def pool_stats() -> dict:
+    """Statistics of the pools of the pooled database aliases of the process."""
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        if isinstance(connection, DatabaseWrapper):
+            stats[alias] = connection.pool.get_stats()
+    return stats
@@ -0,0 +1,15 @@
+from django.db.backends.postgresql import creation
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Closes the pools which would keep connections to the databases the tests create and drop."""
+
+    def create_test_db(self, *args, **kwargs):
+        # Before the name is switched to the test database, the pool of which is a new one.
+        self.connection.close_pool()
+        return super().create_test_db(*args, **kwargs)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # PostgreSQL does not drop a database which has open connections.
+        self.connection.close_pool()
+        super()._destroy_test_db(test_database_name, verbosity)
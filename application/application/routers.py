@@ -0,0 +1,162 @@
+"""Routing of the catalog reads to the read replicas.
+
+The replicas are the databases named ``replica_*`` in DATABASES (see
+SHOP_DB_REPLICAS in the settings). ``ReplicaRouter`` sends the reads of the
+``catalog`` models to them in turn, skipping a replica for
+``UNHEALTHY_SECONDS`` after it could not be connected to, and everything
+else to ``default``.
+
+Read-your-writes: once a request (or a management command) runs a statement
+which changes data on ``default``, its reads go to ``default`` too. The
+statements are watched by a connection execute wrapper, so a write which is
+routed but never runs (e.g. in the transaction of an admin form shown by GET)
+does not pin. ``ReplicaPinMiddleware`` also keeps the next requests of the
+client on ``default`` for ``PIN_SECONDS`` with a cookie, which covers the
+replication lag.
+"""
+import itertools
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import SynchronousOnlyOperation
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+REPLICA_PREFIX = 'replica_'
+ROUTED_APPS = {'catalog'}
+UNHEALTHY_SECONDS = 30
+PIN_SECONDS = 10
+PIN_COOKIE = 'db_pin'
+
+# Why the reads of the current request go to the primary: WROTE (it has
+# written), PIN_COOKIE (the client wrote recently) or PRIMARY_READS.
+WROTE = 'wrote'
+PRIMARY_READS = 'primary_reads'
+_pinned: ContextVar[Optional[str]] = ContextVar('replica_pinned', default=None)
+
+_WRITE_STATEMENT = re.compile(r'\s*(INSERT|UPDATE|DELETE|MERGE|TRUNCATE)\b', re.IGNORECASE)
+
+
+def pin_to_primary() -> None:
+    """Send the rest of the reads of the current request to the primary."""
+    _pinned.set(WROTE)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary in the block, without pinning the rest of the request.
+
+    For values cached under a version stamp, which must not be built from a
+    replica lagging behind the change that bumped the stamp.
+    """
+    token = _pinned.set(_pinned.get() or PRIMARY_READS)
+    try:
+        yield
+    finally:
+        wrote = _pinned.get() == WROTE
+        _pinned.reset(token)
+        if wrote:
+            pin_to_primary()
+
+
+def _pin_on_write(execute, sql, params, many, context):
+    if _WRITE_STATEMENT.match(sql):
+        pin_to_primary()
+    return execute(sql, params, many, context)
+
+
+class ReplicaRouter:
+
+    def __init__(self):
+        self.replicas = [alias for alias in settings.DATABASES if alias.startswith(REPLICA_PREFIX)]
+        self._turns = itertools.count()
+        self._unhealthy_until = {}
+        self._lock = threading.Lock()
+
+    def _is_healthy(self, alias: str) -> bool:
+        if self._unhealthy_until.get(alias, 0) > time.monotonic():
+            return False
+        try:
+            # Opens the connection the query would open anyway.
+            connections[alias].ensure_connection()
+        except SynchronousOnlyOperation:
+            # Routed in an event loop, the query itself will run in a thread.
+            pass
+        except DatabaseError:
+            with self._lock:
+                self._unhealthy_until[alias] = time.monotonic() + UNHEALTHY_SECONDS
+            return False
+        return True
+
+    def _replica(self):
+        with self._lock:
+            start = next(self._turns)
+        for offset in range(len(self.replicas)):
+            alias = self.replicas[(start + offset) % len(self.replicas)]
+            if self._is_healthy(alias):
+                return alias
+        return None
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if not self.replicas or model._meta.app_label not in ROUTED_APPS or _pinned.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads in a transaction see its writes.
+            return None
+        return self._replica()
+
+    def db_for_write(self, model, **hints):
+        # Every write is routed before it runs, on the connection of the thread which runs it.
+        connection = connections[DEFAULT_DB_ALIAS]
+        if _pin_on_write not in connection.execute_wrappers:
+            connection.execute_wrappers.append(_pin_on_write)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return not db.startswith(REPLICA_PREFIX)
+
+
+class ReplicaPinMiddleware:
+    """Keeps the reads of a client on the primary for a while after it wrote."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _pinned.set(PIN_COOKIE if PIN_COOKIE in request.COOKIES else None)
+        try:
+            return self._finish(self.get_response(request))
+        finally:
+            _pinned.reset(token)
+
+    async def __acall__(self, request):
+        token = _pinned.set(PIN_COOKIE if PIN_COOKIE in request.COOKIES else None)
+        try:
+            return self._finish(await self.get_response(request))
+        finally:
+            _pinned.reset(token)
+
+    @staticmethod
+    def _finish(response):
+        if _pinned.get() == WROTE:
+            response.set_cookie(PIN_COOKIE, '1', max_age=PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
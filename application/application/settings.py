@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.0/ref/settings/
 """
 
+import copy
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'catalog.apps.CatalogConfig',
     # 'login.apps.LoginConfig',
@@ -44,7 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'application.sqlstats.SQLStatsMiddleware',
+    'application.routers.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'application.staticfiles.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -79,13 +84,68 @@ WSGI_APPLICATION = 'application.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # The PostgreSQL backend taking connections from a psycopg_pool pool.
+        'ENGINE': 'application.db',
         'NAME': 'webshop',
         'USER': os.getenv('SHOP_POSTGRESQL_USER'),
         'PASSWORD': os.getenv('SHOP_POSTGRESQL_PASSWORD'),
         'HOST': '127.0.0.1',
-        'PORT': '5432'
+        'PORT': '5432',
+        # Connections are returned to the pool at the end of every request.
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.getenv('SHOP_DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.getenv('SHOP_DB_POOL_MAX_SIZE', 10)),
+                'timeout': float(os.getenv('SHOP_DB_POOL_TIMEOUT', 10)),
+                'max_idle': 600,
+                'max_lifetime': 3600,
+                'health_check': True,
+            },
+        },
+    }
+}
+
+
+# Read replicas of the catalog: "host[:port]" separated by commas. They are
+# added as replica_1, replica_2, ... with the settings of the default database,
+# see application/routers.py.
+for number, replica in enumerate(filter(None, os.getenv('SHOP_DB_REPLICAS', '').split(',')), start=1):
+    host, _, port = replica.strip().partition(':')
+    DATABASES[f'replica_{number}'] = replica_settings = copy.deepcopy(DATABASES['default'])
+    replica_settings.update(HOST=host, PORT=port or '5432', TEST={'MIRROR': 'default'})
+    # Fail over quickly to another replica or the primary.
+    replica_settings['OPTIONS']['pool']['timeout'] = float(os.getenv('SHOP_DB_REPLICA_TIMEOUT', 2))
+
+DATABASE_ROUTERS = ['application.routers.ReplicaRouter']
+
+
+# Cache
+
+# catalog.cache keeps its version stamps here, they must be shared by all
+# the worker processes: set SHOP_REDIS_URL (e.g. redis://localhost:6379/0) to
+# keep the cache in Redis. Otherwise the cache is kept in process memory, for
+# a single process only (see the catalog.E001 check).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+if os.getenv('SHOP_REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('SHOP_REDIS_URL'),
     }
+
+# Server worker processes (gunicorn reads WEB_CONCURRENCY as well).
+WORKERS = int(os.getenv('SHOP_WORKERS', os.getenv('WEB_CONCURRENCY', 1)))
+
+
+# Per-request query statistics, see application/sqlstats.py.
+
+SQL_STATS = {
+    'SLOW_REQUEST_MS': float(os.getenv('SHOP_SLOW_REQUEST_MS', 500)),
+    'SAMPLE_RATE': float(os.getenv('SHOP_SLOW_REQUEST_SAMPLE_RATE', 1.0)),
 }
 
 
@@ -126,3 +186,20 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.0/howto/static-files/
 
 STATIC_URL = '/static/'
+
+# manage.py collectstatic writes the fingerprinted and precompressed files here,
+# application.staticfiles.StaticFilesMiddleware serves them.
+STATIC_ROOT = os.path.join(BASE_DIR, 'static_root')
+
+# Identifies the deployed code in the validators of cached pages, set it to a
+# new value (a version or a commit) on every deploy.
+RELEASE = os.getenv('SHOP_RELEASE', '')
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'application.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
@@ -0,0 +1,160 @@
+"""Per-request SQL statistics.
+
+``SQLStatsMiddleware`` counts the queries of every request and the time
+spent in the database through a connection execute wrapper, adds them to
+the ``Server-Timing`` response header and logs a sample of the slow
+requests with the fingerprints of their most expensive and repeated
+(N+1-shaped) statements to the ``application.sqlstats`` logger.
+
+The wrapper is installed once per connection and only adds a clock read
+and a dictionary update to every query. The statistics are kept in a
+context variable, so the queries which async views run through
+``sync_to_async`` in other threads are attributed to their request.
+Queries run while a streaming response is consumed are not counted.
+"""
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Requests slower than this are logged, 0 disables the log.
+    'SLOW_REQUEST_MS': 500,
+    # Share of the slow requests which are logged.
+    'SAMPLE_RATE': 1.0,
+    # A statement run this many times in a request is reported as repeated.
+    'DUPLICATE_THRESHOLD': 3,
+    'SERVER_TIMING': True,
+}
+
+_current: ContextVar[Optional['RequestStats']] = ContextVar('sqlstats', default=None)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql: str) -> str:
+    """The statement with literals and placeholder lists collapsed."""
+    sql = _LITERALS.sub('?', sql)
+    sql = _PLACEHOLDER_LISTS.sub('(...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+class RequestStats:
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+        # SQL (with placeholders) -> [count, duration].
+        self.statements = {}
+
+    def add(self, sql: str, duration: float):
+        self.queries += 1
+        self.duration += duration
+        statement = self.statements.setdefault(sql, [0, 0.0])
+        statement[0] += 1
+        statement[1] += duration
+
+    def fingerprints(self) -> dict:
+        result = {}
+        for sql, (count, duration) in self.statements.items():
+            statement = result.setdefault(fingerprint(sql), [0, 0.0])
+            statement[0] += count
+            statement[1] += duration
+        return result
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add(sql, time.perf_counter() - start)
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+class SQLStatsMiddleware:
+    """Counts the queries of every request, see the module docstring.
+
+    Configured by the ``SQL_STATS`` setting, a dictionary overriding
+    ``DEFAULTS``. Put it first in MIDDLEWARE to time the whole request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = {**DEFAULTS, **getattr(settings, 'SQL_STATS', {})}
+        connection_created.connect(_install_wrapper, dispatch_uid='application.sqlstats')
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    def _finish(self, request, response, stats: RequestStats, total: float):
+        if self.options['SERVER_TIMING']:
+            description = f'{stats.queries} queries'
+            # Same SQL, different parameters: the shape of N+1 queries.
+            repeated = sum(count >= self.options['DUPLICATE_THRESHOLD'] for count, _ in stats.statements.values())
+            if repeated:
+                description += f', {repeated} repeated'
+            timing = f'db;dur={stats.duration * 1000:.1f};desc="{description}", total;dur={total * 1000:.1f}'
+            if response.has_header('Server-Timing'):
+                timing = f'{response["Server-Timing"]}, {timing}'
+            response['Server-Timing'] = timing
+
+        slow_ms = self.options['SLOW_REQUEST_MS']
+        if slow_ms and total * 1000 >= slow_ms and random.random() < self.options['SAMPLE_RATE']:
+            self._log(request, stats, total)
+        return response
+
+    def _log(self, request, stats: RequestStats, total: float):
+        fingerprints = stats.fingerprints()
+        lines = [f'Slow request {request.method} {request.get_full_path()}: {total * 1000:.1f} ms, '
+                 f'{stats.queries} queries, {stats.duration * 1000:.1f} ms in the database.']
+        repeated = sorted(((count, sql) for sql, (count, _) in fingerprints.items()
+                           if count >= self.options['DUPLICATE_THRESHOLD']), reverse=True)
+        for count, sql in repeated:
+            lines.append(f'  repeated {count} times: {sql}')
+        slowest = sorted(((duration, count, sql) for sql, (count, duration) in fingerprints.items()),
+                         reverse=True)[:5]
+        for duration, count, sql in slowest:
+            lines.append(f'  {duration * 1000:.1f} ms in {count} queries: {sql}')
+        logger.warning('\n'.join(lines))
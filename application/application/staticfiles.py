@@ -0,0 +1,169 @@
+"""Fingerprinted, precompressed static files and their serving.
+
+``collectstatic`` with ``CompressedManifestStaticFilesStorage`` writes every
+file under a content hashed name and, next to it, its gzip and (if the
+``brotli`` package is installed) brotli compressed variants.
+``StaticFilesMiddleware`` serves the collected files from the application
+itself, picking the variant by Accept-Encoding, with far-future immutable
+caching of the hashed names.
+"""
+import functools
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, HttpResponseNotModified
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSED_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.xml', '.map', '.ico')
+# Compressing smaller files does not pay off.
+MIN_COMPRESS_SIZE = 256
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+CACHE_CONTROL = 'public, max-age=60'
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage which also writes .gz and .br variants of text files."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not dry_run and isinstance(hashed_name, str):
+                # Both the original name (used with DEBUG) and the hashed one.
+                for compressed_name in {name, hashed_name}:
+                    self._compress(compressed_name)
+            yield name, hashed_name, processed
+
+    def _compress(self, name):
+        if not name.endswith(COMPRESSED_EXTENSIONS):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            content = file.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content, quality=11)))
+        for extension, compressed in variants:
+            if len(compressed) < len(content):
+                with open(path + extension, 'wb') as file:
+                    file.write(compressed)
+
+
+@functools.lru_cache(maxsize=None)
+def build_id() -> str:
+    """Identifier of the deployed build: a hash of RELEASE and of the collected staticfiles manifest.
+
+    Changes with a deploy which changes the code (RELEASE) or the hashed
+    names of the static files, for the validators of the pages which refer
+    to them.
+    """
+    digest = hashlib.sha256(settings.RELEASE.encode())
+    manifest_name = getattr(staticfiles_storage, 'manifest_name', None)
+    if manifest_name and staticfiles_storage.exists(manifest_name):
+        with staticfiles_storage.open(manifest_name) as manifest:
+            digest.update(manifest.read())
+    return digest.hexdigest()[:12]
+
+
+def _accepted_encodings(request) -> set:
+    encodings = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        encoding, _, params = item.strip().partition(';')
+        if not re.match(r'\s*q\s*=\s*0(\.0*)?\s*$', params):
+            encodings.add(encoding.strip().lower())
+    return encodings
+
+
+class StaticFile:
+
+    def __init__(self, path: str, immutable: bool):
+        self.path = path
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        stat = os.stat(path)
+        self.etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+        self.cache_control = IMMUTABLE_CACHE_CONTROL if immutable else CACHE_CONTROL
+        # Content-Encoding -> file, in order of preference.
+        self.variants = [(encoding, path + extension) for encoding, extension in (('br', '.br'), ('gzip', '.gz'))
+                         if os.path.exists(path + extension)]
+
+    def response(self, request) -> HttpResponse:
+        if request.META.get('HTTP_IF_NONE_MATCH') == self.etag:
+            response = HttpResponseNotModified()
+        else:
+            accepted = _accepted_encodings(request)
+            encoding, path = next(((encoding, path) for encoding, path in self.variants if encoding in accepted),
+                                  (None, self.path))
+            with open(path, 'rb') as file:
+                content = file.read()
+            response = HttpResponse(b'' if request.method == 'HEAD' else content, content_type=self.content_type)
+            response['Content-Length'] = len(content)
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = self.etag
+        response['Cache-Control'] = self.cache_control
+        if self.variants:
+            response['Vary'] = 'Accept-Encoding'
+        return response
+
+
+class StaticFilesMiddleware:
+    """Serves the files collected into STATIC_ROOT.
+
+    The files are indexed once at startup, run collectstatic before starting
+    the server. The middleware is disabled when nothing has been collected.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.files = self._index()
+        if not self.files:
+            raise MiddlewareNotUsed
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _index() -> dict:
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            return {}
+        hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        files = {}
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, name)
+                relative = os.path.relpath(path, root).replace(os.sep, '/')
+                files[relative] = StaticFile(path, immutable=relative in hashed_names)
+        return files
+
+    def _serve(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefix):
+            return None
+        static_file = self.files.get(request.path[len(self.prefix):])
+        return static_file and static_file.response(request)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self._serve(request) or await self.get_response(request)
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from . import views
+
 
 urlpatterns = [
+    path('admin/db-pool/', views.db_pool_stats, name='db_pool_stats'),
     path('admin/', admin.site.urls),
     path('', include('catalog.urls')),
 ]
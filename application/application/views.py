@@ -0,0 +1,11 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpRequest, JsonResponse
+
+from .db.base import pool_stats
+
+
+@staff_member_required
+def db_pool_stats(request: HttpRequest) -> JsonResponse:
+    """View со статистикой пулов соединений с базой данных текущего процесса."""
+
+    return JsonResponse(pool_stats())
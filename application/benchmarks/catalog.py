@@ -0,0 +1,163 @@
+"""Latency, query count and memory of the catalog hot paths against a baseline.
+
+Run it against a seeded database (``manage.py seed_catalog``). Every case is
+measured for latency percentiles, the number of SQL queries and the peak
+Python memory, and compared with the stored baseline. The run fails (exit
+status 1) when a case got slower or heavier past the tolerance or runs
+more queries than before.
+
+    cd application && python -m benchmarks.catalog --update-baseline
+    cd application && python -m benchmarks.catalog
+
+The baseline depends on the machine and the dataset, keep one per
+environment.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import django
+
+from benchmarks.db_pool import percentile
+
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'catalog_baseline.json')
+LATENCY_METRICS = ('p50', 'p95', 'p99')
+
+PAGES = {
+    'index': '/',
+    'api_goods': '/api/goods/',
+    'admin_good': '/admin/catalog/good/',
+    'admin_goodcost': '/admin/catalog/goodcost/',
+    'admin_goodcount': '/admin/catalog/goodcount/',
+    'admin_goodplace': '/admin/catalog/goodplace/',
+}
+
+
+def page(client, path):
+    def run():
+        response = client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f'GET {path} returned {response.status_code}.')
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return run
+
+
+def cases(client, term):
+    from catalog.lookup import lookup_goods_in_db
+    from catalog.models import GoodAvailability
+    from catalog.search import search_goods
+    from catalog.tree import build_category_tree
+
+    result = {name: page(client, path) for name, path in PAGES.items()}
+    result.update({
+        'category_tree': build_category_tree,
+        'search_goods': lambda: list(search_goods(term)[:50]),
+        'lookup_goods': lambda: lookup_goods_in_db(term[:3], 10),
+        'available_goods': lambda: list(GoodAvailability.objects.filter(total_count__gt=0)
+                                        .order_by('-total_count')[:50]),
+    })
+    return result
+
+
+def measure(run, iterations) -> dict:
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    run()  # Warm up the caches.
+    with CaptureQueriesContext(connection) as queries:
+        run()
+    tracemalloc.start()
+    try:
+        run()
+        memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    result = {metric: round(percentile(timings, int(metric[1:])), 3) for metric in LATENCY_METRICS}
+    result.update(queries=len(queries), memory_kib=round(memory / 1024, 1))
+    return result
+
+
+def regressions(result: dict, baseline: dict, latency_tolerance: float, memory_tolerance: float) -> list:
+    found = []
+    for metric in LATENCY_METRICS:
+        if result[metric] > baseline[metric] * (1 + latency_tolerance):
+            found.append(f'{metric} {baseline[metric]:.2f} -> {result[metric]:.2f} ms')
+    if result['queries'] > baseline['queries']:
+        found.append(f'queries {baseline["queries"]} -> {result["queries"]}')
+    if result['memory_kib'] > baseline['memory_kib'] * (1 + memory_tolerance):
+        found.append(f'memory {baseline["memory_kib"]} -> {result["memory_kib"]} KiB')
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--case', action='append', help='Run only the given cases.')
+    parser.add_argument('--term', default='молоко', help='Search term of the search and lookup cases.')
+    parser.add_argument('--host', default='localhost', help='Host header, must be in ALLOWED_HOSTS.')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--latency-tolerance', type=float, default=0.25,
+                        help='Allowed relative growth of the latency percentiles.')
+    parser.add_argument('--memory-tolerance', type=float, default=0.2,
+                        help='Allowed relative growth of the peak memory.')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
+    django.setup()
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+    from django.test import Client
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    results = {}
+    failed = False
+    # The admin user and its session are rolled back at the end.
+    with transaction.atomic():
+        client = Client(HTTP_HOST=args.host)
+        client.force_login(get_user_model().objects.create(
+            username='benchmark', is_staff=True, is_superuser=True,
+        ))
+        for name, run in cases(client, args.term).items():
+            if args.case and name not in args.case:
+                continue
+            results[name] = result = measure(run, args.iterations)
+            print(f'{name:>16}: p50 {result["p50"]:8.2f} ms, p95 {result["p95"]:8.2f} ms, '
+                  f'p99 {result["p99"]:8.2f} ms, {result["queries"]:3} queries, {result["memory_kib"]:9.1f} KiB')
+            if not args.update_baseline and name in baseline:
+                found = regressions(result, baseline[name], args.latency_tolerance, args.memory_tolerance)
+                if found:
+                    failed = True
+                    print(f'{"":>16}  REGRESSION: {", ".join(found)}')
+        transaction.set_rollback(True)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write('\n')
+        print(f'Baseline saved to {args.baseline}.')
+    elif not baseline:
+        print('No baseline yet, save one with --update-baseline.')
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Connection setup cost per request with and without the connection pool.
+
+Every simulated request does what Django does for a request: opens the
+connection (or takes it from the pool), runs a query and closes it at the
+end of the request.
+
+    cd application && python -m benchmarks.db_pool --requests 500
+"""
+import argparse
+import copy
+import os
+import statistics
+import time
+
+import django
+
+
+def percentile(timings, percent):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * percent / 100))]
+
+
+def run(connection, requests):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        connection.close()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--database', default='default')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
+    django.setup()
+    from django.db import connections
+    from django.db.utils import load_backend
+
+    settings_dict = copy.deepcopy(connections.settings[args.database])
+    direct_settings = copy.deepcopy(settings_dict)
+    direct_settings['OPTIONS'].pop('pool', None)
+    backends = {
+        'direct': load_backend('django.db.backends.postgresql').DatabaseWrapper(direct_settings, args.database),
+        'pooled': load_backend('application.db').DatabaseWrapper(settings_dict, args.database),
+    }
+
+    results = {}
+    for name, connection in backends.items():
+        run(connection, min(args.requests, 10))  # Warm up (and fill the pool).
+        results[name] = timings = run(connection, args.requests)
+        print(f'{name:>7}: mean {statistics.mean(timings):7.2f} ms, p50 {percentile(timings, 50):7.2f} ms, '
+              f'p95 {percentile(timings, 95):7.2f} ms, p99 {percentile(timings, 99):7.2f} ms')
+
+    saved = statistics.mean(results['direct']) - statistics.mean(results['pooled'])
+    print(f'Connection setup removed from every request: {saved:.2f} ms on average.')
+    print(f'Pool stats: {backends["pooled"].pool.get_stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,60 @@
 from django.contrib import admin
+from django.db.models import Case, When
+from django.utils import timezone
 
+from .lookup import lookup_goods
+from .pagination import EstimatedCountPaginator
+from .search import search_goods
 from .models import GoodCategory, GoodType, Unit, Good, PlaceType, Contact, \
                     PhoneNumber, Email, Url, Address, GoodPlace, GoodCost, \
-                    GoodCount, Employee, GoodSubjectArea, Currency
+                    GoodCount, Employee, GoodSubjectArea, Currency, Task
 
 
-class GoodAdmin(admin.ModelAdmin):
+# One page of the admin autocomplete widget.
+AUTOCOMPLETE_RESULTS = 20
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Admin of a table with millions of rows.
+
+    The changelist neither counts the table exactly nor, when searching,
+    counts it a second time for the "N total" link.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class GoodAdmin(LargeTableAdmin):
     list_display = ('name', 'code', 'description')
     list_display_links = ('name', 'code')
     search_fields = ('name', 'code', 'description')
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        if request.resolver_match and request.resolver_match.url_name == 'autocomplete':
+            # Autocomplete widgets get partly typed names and code prefixes,
+            # which the full-text search does not match.
+            ids = [row['id'] for row in lookup_goods(search_term, AUTOCOMPLETE_RESULTS)]
+            if not ids:
+                return queryset.none(), False
+            return queryset.filter(pk__in=ids) \
+                           .order_by(Case(*(When(pk=pk, then=position) for position, pk in enumerate(ids)))), False
+        # The changelist keeps the ordering of the queryset after its own, which is empty for goods.
+        return search_goods(search_term, queryset).order_by('-search_rank', 'pk'), False
+
 
 class GoodTypeAdmin(admin.ModelAdmin):
     list_display = ('name', 'category')
     list_display_links = ('name',)
+    list_select_related = ('category__subject_area',)
     search_fields = ('name',)
 
 
 class GoodCategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'subject_area')
     list_display_links = ('name',)
+    list_select_related = ('subject_area',)
     search_fields = ('name',)
 
 
@@ -35,19 +70,19 @@ class PlaceTypeAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
 
-class ContactAdmin(admin.ModelAdmin):
+class ContactAdmin(LargeTableAdmin):
     list_display = ('first_name', 'last_name')
     list_display_links = ('first_name', 'last_name')
-    search_fields = ('first_name', 'last_name')
+    search_fields = ('last_name', 'first_name')
 
 
-class PhoneNumberAdmin(admin.ModelAdmin):
+class PhoneNumberAdmin(LargeTableAdmin):
     list_display = ('phone_number',)
     list_display_links = ('phone_number',)
     search_fields = ('phone_number',)
 
 
-class EmailAdmin(admin.ModelAdmin):
+class EmailAdmin(LargeTableAdmin):
     list_display = ('email',)
     list_display_links = ('email',)
     search_fields = ('email',)
@@ -59,35 +94,45 @@ class UrlAdmin(admin.ModelAdmin):
     search_fields = ('url',)
 
 
-class AddressAdmin(admin.ModelAdmin):
+class AddressAdmin(LargeTableAdmin):
     list_display = ('country', 'region', 'city', 'street',
                     'building', 'housing', 'entrance', 'floor', 'room')
     list_display_links = ('country', 'region', 'city', 'street',)
-    search_fields = ('country', 'region', 'city', 'street',)
+    # Indexed columns only, the addresses are searched by the autocomplete widgets.
+    search_fields = ('city', 'street')
 
 
 class GoodPlaceAdmin(admin.ModelAdmin):
     list_display = ('name', 'contact', 'address', 'place_type')
     list_display_links = ('name',)
-    search_fields = ('name', 'contact', 'address', 'place_type')
+    list_select_related = ('contact', 'address', 'place_type')
+    search_fields = ('name', 'contact__last_name', 'address__city', 'address__street')
+    autocomplete_fields = ('contact', 'address')
 
 
-class GoodCostAdmin(admin.ModelAdmin):
+class GoodCostAdmin(LargeTableAdmin):
     list_display = ('good', 'cost', 'currency', 'good_place')
     list_display_links = ('cost',)
-    search_fields = ('cost',)
+    list_select_related = ('good', 'good_place', 'currency')
+    # Both on the goods table, so the search is a scan of its indexes.
+    search_fields = ('good__name', 'good__code__startswith')
+    autocomplete_fields = ('good', 'good_place')
 
 
-class GoodCountAdmin(admin.ModelAdmin):
+class GoodCountAdmin(LargeTableAdmin):
     list_display = ('good', 'count', 'good_place',)
     list_display_links = ('good', 'count', 'good_place',)
-    search_fields = ('good', 'count', 'good_place',)
+    list_select_related = ('good', 'good_place')
+    search_fields = ('good__name', 'good__code__startswith')
+    autocomplete_fields = ('good', 'good_place')
 
 
-class EmployeeAdmin(admin.ModelAdmin):
+class EmployeeAdmin(LargeTableAdmin):
     list_display = ('contact', 'position_name', 'job_place', 'address')
     list_display_links = ('contact', 'position_name', 'job_place', 'address')
-    search_fields = ('contact', 'position_name', 'job_place', 'address')
+    list_select_related = ('contact', 'job_place', 'address')
+    search_fields = ('contact__last_name', 'contact__first_name')
+    autocomplete_fields = ('contact', 'address', 'job_place')
 
 
 class GoodSubjectAreaAdmin(admin.ModelAdmin):
@@ -97,11 +142,25 @@ class GoodSubjectAreaAdmin(admin.ModelAdmin):
 
 
 class CurrencyAdmin(admin.ModelAdmin):
-    list_display = ('name', 'short_name')
+    list_display = ('name', 'short_name', 'rate')
     list_display_links = ('name', 'short_name')
     search_fields = ('name', 'short_name')
 
 
+class TaskAdmin(LargeTableAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'created_at', 'finished_at')
+    list_display_links = ('name',)
+    list_filter = ('status',)
+    search_fields = ('name',)
+    ordering = ('-id',)
+    actions = ('run_again',)
+
+    @admin.action(description='Запустить снова')
+    def run_again(self, request, queryset):
+        queryset.exclude(status=Task.RUNNING).update(status=Task.QUEUED, attempts=0, run_at=timezone.now(),
+                                                     finished_at=None)
+
+
 admin.site.register(GoodCategory, GoodCategoryAdmin)
 admin.site.register(GoodType, GoodTypeAdmin)
 admin.site.register(Unit, UnitAdmin)
@@ -118,3 +177,4 @@ admin.site.register(GoodCount, GoodCountAdmin)
 admin.site.register(Employee, EmployeeAdmin)
 admin.site.register(GoodSubjectArea, GoodSubjectAreaAdmin)
 admin.site.register(Currency, CurrencyAdmin)
+admin.site.register(Task, TaskAdmin)
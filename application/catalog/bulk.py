@@ -0,0 +1,24 @@
+"""Bulk loading of catalog rows through COPY."""
+from typing import Iterable, Sequence
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> None:
+    """Stream the rows into the table through ``COPY ... FROM STDIN``."""
+    if not is_psycopg3:
+        raise ImproperlyConfigured('Bulk loading through COPY requires psycopg 3.')
+
+    quote_name = connection.ops.quote_name
+    sql = f'COPY {quote_name(table)} ({", ".join(quote_name(column) for column in columns)}) FROM STDIN'
+    # cursor.cursor is the psycopg cursor wrapped by Django.
+    with cursor.cursor.copy(sql) as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+def lookup_map(queryset, key: str) -> dict:
+    """Map of the ``key`` field values to the primary keys of the queryset."""
+    return dict(queryset.values_list(key, 'pk'))
@@ -0,0 +1,74 @@
+"""Versioned two-level (in-process + shared) caching of catalog data."""
+import threading
+import time
+
+from django.core.cache import cache
+
+from application.routers import primary_reads
+
+
+VERSION_KEY = 'catalog:version:{}'
+VALUE_KEY = 'catalog:{}:{}'
+
+# Namespaces of the version stamps.
+TREE = 'tree'
+GOODS = 'goods'
+
+
+def get_version(namespace: str) -> int:
+    """Return the current version stamp of the namespace.
+
+    The stamp is the time (in nanoseconds) of the last change, so a stamp which
+    has been evicted from the shared cache never comes back with an old value.
+    """
+    key = VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace: str) -> None:
+    """Mark every value cached in the namespace as stale in all processes."""
+    cache.set(VERSION_KEY.format(namespace), time.time_ns(), None)
+
+
+class VersionedCache:
+    """Value kept in process memory and in the shared cache under a version stamp.
+
+    Reading costs one shared cache lookup of the version stamp while the value
+    is unchanged, and ``build`` runs only when no process has the current one.
+    """
+
+    def __init__(self, namespace: str, build, timeout: int = 24 * 60 * 60):
+        self.namespace = namespace
+        self.build = build
+        self.timeout = timeout
+        self._local = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        # The version is read before building, so a change which happens while
+        # the value is being built leaves it under an already stale key.
+        version = get_version(self.namespace)
+        local = self._local
+        if local is not None and local[0] == version:
+            return local[1]
+
+        with self._lock:
+            local = self._local
+            if local is not None and local[0] == version:
+                return local[1]
+            key = VALUE_KEY.format(self.namespace, version)
+            value = cache.get(key)
+            if value is None:
+                with primary_reads():
+                    value = self.build()
+                cache.set(key, value, self.timeout)
+            self._local = (version, value)
+        return value
+
+    def invalidate(self) -> None:
+        self._local = None
+        bump_version(self.namespace)
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+LOCMEM_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """The version stamps of catalog.cache invalidate the data of other processes only through a shared cache."""
+    if settings.CACHES['default']['BACKEND'] != LOCMEM_BACKEND or getattr(settings, 'WORKERS', 1) <= 1:
+        return []
+    return [Error(
+        f'The default cache is kept in process memory, but {settings.WORKERS} worker processes are configured.',
+        hint='Changes to the catalog would be seen only by the process which made them. '
+             'Set SHOP_REDIS_URL to keep the cache in Redis, or run a single worker.',
+        id='catalog.E001',
+    )]
@@ -0,0 +1,42 @@
+"""Lookup of contacts by phone number or email."""
+from typing import Optional
+
+from django.db.models import F
+
+from .models import Email, Employee, GoodPlace, PhoneNumber
+from .normalize import normalize_email, normalize_phone
+
+
+def find_contact(phone_number: str = None, email: str = None) -> Optional[dict]:
+    """Contact having the phone number or the email with its phones, emails, places and employee records.
+
+    The contact is found through the unique index of the normalized value.
+    """
+    if phone_number is not None:
+        normalized = normalize_phone(phone_number)
+        queryset = PhoneNumber.objects.filter(phone_e164=normalized)
+    else:
+        normalized = normalize_email(email)
+        queryset = Email.objects.filter(email_normalized=normalized)
+    if normalized is None:
+        return None
+
+    contact = queryset.filter(contact__isnull=False).values(
+        'contact_id', first_name=F('contact__first_name'), last_name=F('contact__last_name'),
+    ).first()
+    if contact is None:
+        return None
+
+    contact_id = contact.pop('contact_id')
+    return {
+        'id': contact_id,
+        **contact,
+        'phone_numbers': list(PhoneNumber.objects.filter(contact_id=contact_id)
+                                                 .values_list('phone_number', flat=True).order_by('id')),
+        'emails': list(Email.objects.filter(contact_id=contact_id)
+                                    .values_list('email', flat=True).order_by('id')),
+        'places': list(GoodPlace.objects.filter(contact_id=contact_id).values('id', 'name').order_by('id')),
+        'employees': list(Employee.objects.filter(contact_id=contact_id).values(
+            'id', 'position_name', 'job_place_id', job_place_name=F('job_place__name'),
+        ).order_by('id')),
+    }
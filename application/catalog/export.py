@@ -0,0 +1,93 @@
+"""Streaming export of the price list."""
+import csv
+import json
+from typing import AsyncIterator, Iterator
+
+from asgiref.sync import sync_to_async
+from django.db import router, transaction
+
+from .models import GoodCost
+
+
+PRICE_LIST_FIELDS = ('good__code', 'good__name', 'good_place__name', 'currency__short_name', 'cost')
+PRICE_LIST_COLUMNS = ('code', 'name', 'place', 'currency', 'cost')
+CHUNK_SIZE = 2000
+
+
+def price_list_rows(chunk_size: int = CHUNK_SIZE) -> Iterator[tuple]:
+    """Rows of the price list read from a server-side cursor in chunks.
+
+    The cursor is read inside a transaction: in autocommit mode Django
+    declares it WITH HOLD, and PostgreSQL then computes the whole result
+    before returning the first row. Without it, rows ordered by the primary
+    key are read from the index a chunk at a time.
+    """
+    using = router.db_for_read(GoodCost)
+    with transaction.atomic(using=using):
+        yield from GoodCost.objects.using(using).order_by('id').values_list(*PRICE_LIST_FIELDS) \
+                                   .iterator(chunk_size=chunk_size)
+
+
+class _Line:
+    """File-like object which returns what is written to it (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(PRICE_LIST_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(PRICE_LIST_COLUMNS, row)), ensure_ascii=False) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (_csv_lines, 'text/csv'),
+    'jsonl': (_jsonl_lines, 'application/jsonl'),
+}
+
+
+def export_price_list(export_format: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Price list as text chunks of ``chunk_size`` lines each.
+
+    The first line (the CSV header) is sent alone, the rows follow a chunk
+    at a time as the cursor returns them.
+    """
+    lines = EXPORT_FORMATS[export_format][0](price_list_rows(chunk_size))
+    first = next(lines, None)
+    if first is None:
+        return
+    yield first
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+async def aexport_price_list(export_format: str, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[str]:
+    """``export_price_list`` for ASGI servers.
+
+    Django reads a synchronous streaming iterator into memory as a whole
+    under ASGI, so the chunks are fetched one by one in the thread which owns
+    the database connection.
+    """
+    chunks = export_price_list(export_format, chunk_size)
+    try:
+        while True:
+            chunk = await sync_to_async(next)(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # Ends the transaction of the cursor when the client goes away.
+        await sync_to_async(chunks.close)()
@@ -0,0 +1,190 @@
+"""Faceted filtering of goods: a page of goods and the counts of every facet in one query.
+
+The facets are counted with GROUPING SETS over the filtered goods, among
+the goods matching all the filters. Prices are the cheapest ones of the
+availability summary; the price ranges and filters are in the base currency
+(see ``Currency.rate``). The counts of the unfiltered
+catalog are cached for ``UNFILTERED_FACETS_TIMEOUT`` seconds (and until the
+goods change), then only the page is queried.
+"""
+import json
+from typing import List, Optional, Tuple
+
+from django.core.cache import cache as shared_cache
+from django.db import connections, router
+
+from . import cache
+from .models import Good
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+from .tree import get_category_tree
+
+
+# Bounds of the price ranges in the base currency: below 100, 100 - 500, ..., 10000 and more.
+PRICE_EDGES = (100, 500, 1000, 5000, 10000)
+UNFILTERED_FACETS_TIMEOUT = 60
+
+# Facet -> the grouped columns, the first one is the value.
+FACETS = {
+    'subject_area': ('subject_area_id', 'subject_area_name'),
+    'category': ('category_id', 'category_name'),
+    'type': ('type_id', 'type_name'),
+    'unit': ('unit_id', 'unit_name'),
+    'in_stock': ('in_stock',),
+    'price': ('price_bucket',),
+}
+# Filter -> condition on the goods.
+FILTERS = {
+    'type': 'g.type_id = %s',
+    'unit': 'g.unit_id = %s',
+    'price_min': 'a.min_cost_base >= %s',
+    'price_max': 'a.min_cost_base <= %s',
+}
+# Subtree filter -> the method of the category tree giving the prefix of the paths of the goods.
+PATH_FILTERS = {
+    'subject_area': 'subject_area_path',
+    'category': 'category_path',
+}
+
+FILTERED_SQL = '''
+    WITH filtered AS (
+        SELECT g.id, g.code, g.name, g.unit_id, u.short_name AS unit_name,
+               g.type_id, t.name AS type_name, t.category_id, c.name AS category_name,
+               c.subject_area_id, sa.name AS subject_area_name,
+               coalesce(a.total_count, 0) AS total_count, coalesce(a.total_count, 0) > 0 AS in_stock,
+               a.min_cost, cur.short_name AS min_cost_currency,
+               width_bucket(a.min_cost_base, %s::double precision[]) AS price_bucket
+        FROM catalog_good g
+        LEFT JOIN catalog_unit u ON u.id = g.unit_id
+        LEFT JOIN catalog_goodtype t ON t.id = g.type_id
+        LEFT JOIN catalog_goodcategory c ON c.id = t.category_id
+        LEFT JOIN catalog_goodsubjectarea sa ON sa.id = c.subject_area_id
+        LEFT JOIN catalog_goodavailability a ON a.good_id = g.id
+        LEFT JOIN catalog_currency cur ON cur.id = a.min_cost_currency_id
+        WHERE {where}
+    )
+'''
+PAGE_SQL = '''
+    SELECT coalesce(json_agg(r), '[]') FROM (
+        SELECT id, code, name, unit_name AS unit, type_id, total_count, min_cost, min_cost_currency
+        FROM filtered
+        WHERE {after}
+        ORDER BY name, id
+        LIMIT %s
+    ) r
+'''
+FACETS_SQL = '''
+    SELECT json_agg(f) FROM (
+        SELECT {columns}, GROUPING({values}) AS grouping, count(*) AS count
+        FROM filtered
+        GROUP BY GROUPING SETS ({sets}, ())
+    ) f
+'''
+PAGE_ORDERING = ('name', 'id')
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def _where(filters: dict) -> Tuple[str, list]:
+    conditions, params = ['true'], []
+    for name, value in filters.items():
+        if name == 'in_stock':
+            conditions.append('a.total_count > 0' if value else 'coalesce(a.total_count, 0) = 0')
+        elif name in PATH_FILTERS:
+            prefix = getattr(get_category_tree(), PATH_FILTERS[name])(value)
+            if prefix is None:
+                conditions.append('false')
+            else:
+                conditions.append('g.category_path LIKE %s')
+                params.append(prefix + '%')
+        elif name in FILTERS:
+            conditions.append(FILTERS[name])
+            params.append(value)
+        else:
+            raise InvalidFilter(f'Unknown filter {name}.')
+    return ' AND '.join(conditions), params
+
+
+def _facets_sql() -> str:
+    values = [columns[0] for columns in FACETS.values()]
+    return FACETS_SQL.format(
+        columns=', '.join(column for columns in FACETS.values() for column in columns),
+        values=', '.join(values),
+        sets=', '.join(f'({", ".join(columns)})' for columns in FACETS.values()),
+    )
+
+
+def _load(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _price_range(bucket: int) -> dict:
+    edges = (None,) + PRICE_EDGES + (None,)
+    return {'min': edges[bucket], 'max': edges[bucket + 1]}
+
+
+def _group_facets(rows: List[dict]) -> dict:
+    """Facet -> values with their counts, from the rows of the grouping sets."""
+    facets = {name: [] for name in FACETS}
+    facets['total'] = 0
+    # GROUPING() sets the bit of every column which is not grouped by.
+    full_mask = (1 << len(FACETS)) - 1
+    masks = {full_mask ^ (1 << (len(FACETS) - 1 - index)): name for index, name in enumerate(FACETS)}
+    for row in rows or []:
+        name = masks.get(row['grouping'])
+        if name is None:
+            facets['total'] = row['count']
+            continue
+        columns = FACETS[name]
+        value = row[columns[0]]
+        if value is None:
+            continue
+        if name == 'price':
+            item = _price_range(value)
+        elif len(columns) > 1:
+            item = {'id': value, 'name': row[columns[1]]}
+        else:
+            item = {'value': value}
+        item['count'] = row['count']
+        facets[name].append(item)
+    for name in ('subject_area', 'category', 'type', 'unit'):
+        facets[name].sort(key=lambda item: (-item['count'], item['name'] or '', item['id']))
+    return facets
+
+
+def faceted_goods(filters: dict, cursor: Optional[str], limit: int) -> dict:
+    """Page of the goods matching the filters, the cursor of the next page and the facet counts."""
+    where, where_params = _where(filters)
+    after, after_params = 'true', []
+    if cursor:
+        after = '(name, id) > (%s, %s)'
+        after_params = decode_cursor(cursor, len(PAGE_ORDERING))
+        if not isinstance(after_params[0], str) or not isinstance(after_params[1], int):
+            raise InvalidCursor('Malformed cursor.')
+
+    facets = None
+    facets_key = None
+    if not filters:
+        facets_key = cache.VALUE_KEY.format('facets', cache.get_version(cache.GOODS))
+        facets = shared_cache.get(facets_key)
+
+    sql = FILTERED_SQL.format(where=where) + f'SELECT ({PAGE_SQL.format(after=after)})'
+    params = [list(PRICE_EDGES), *where_params, *after_params, limit + 1]
+    if facets is None:
+        sql += f', ({_facets_sql()})'
+
+    with connections[router.db_for_read(Good)].cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        row = db_cursor.fetchone()
+
+    rows = _load(row[0])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][field] for field in PAGE_ORDERING])
+    if facets is None:
+        facets = _group_facets(_load(row[1]))
+        if facets_key:
+            shared_cache.set(facets_key, facets, UNFILTERED_FACETS_TIMEOUT)
+    return {'results': rows, 'next': next_cursor, 'facets': facets}
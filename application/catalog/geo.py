@@ -0,0 +1,56 @@
+"""Nearest places with a good in stock, over the coordinates of ``Address``.
+
+Runs on stock PostgreSQL: the candidates are cut by a bounding box served by
+the (latitude, longitude) B-tree index of the addresses and ordered by the
+great-circle (haversine) distance.
+"""
+import math
+from typing import List
+
+from django.db.models import F, FloatField
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+from .models import GoodCount
+
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def distance_km(latitude: float, longitude: float, prefix: str = ''):
+    """Expression of the haversine distance from the point to the address in ``prefix``."""
+    latitude0, longitude0 = math.radians(latitude), math.radians(longitude)
+    place_latitude = Radians(F(f'{prefix}latitude'))
+    place_longitude = Radians(F(f'{prefix}longitude'))
+    haversine = Power(Sin((place_latitude - latitude0) / 2), 2) \
+        + math.cos(latitude0) * Cos(place_latitude) * Power(Sin((place_longitude - longitude0) / 2), 2)
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(haversine), output_field=FloatField())
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float, prefix: str = '') -> dict:
+    """Filter of the addresses in ``prefix`` lying in the box around the circle."""
+    delta = radius_km / KM_PER_DEGREE
+    lookups = {f'{prefix}latitude__range': (latitude - delta, latitude + delta)}
+    cos_latitude = math.cos(math.radians(latitude))
+    longitude_delta = delta / cos_latitude if cos_latitude > 1e-6 else 360
+    # Near the poles and the antimeridian the box cannot be cut by longitude.
+    if longitude - longitude_delta >= -180 and longitude + longitude_delta <= 180:
+        lookups[f'{prefix}longitude__range'] = (longitude - longitude_delta, longitude + longitude_delta)
+    return lookups
+
+
+def nearest_places_with_stock(good_id: int, latitude: float, longitude: float, limit: int,
+                              radius_km: float) -> List[dict]:
+    """Places within the radius having the good in stock, the nearest first."""
+    prefix = 'good_place__address__'
+    return list(
+        GoodCount.objects.filter(good_id=good_id, count__gt=0, **bounding_box(latitude, longitude, radius_km, prefix))
+                         .annotate(distance=distance_km(latitude, longitude, prefix))
+                         .filter(distance__lte=radius_km)
+                         .order_by('distance', 'good_place_id')
+                         .values('good_place_id', 'count', 'distance',
+                                 place=F('good_place__name'),
+                                 city=F(f'{prefix}city'), street=F(f'{prefix}street'),
+                                 building=F(f'{prefix}building'),
+                                 latitude=F(f'{prefix}latitude'), longitude=F(f'{prefix}longitude'))[:limit]
+    )
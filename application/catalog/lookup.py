@@ -0,0 +1,105 @@
+"""Fuzzy lookup of goods by code and name backed by pg_trgm indexes."""
+import threading
+from collections import Counter, OrderedDict
+from typing import List
+
+from django.contrib.postgres.search import TrigramWordDistance
+
+from application.routers import primary_reads
+
+from . import cache
+from .models import Good
+
+
+# pg_trgm cannot match terms shorter than a trigram well,
+# so they are looked up as code prefixes.
+MIN_TRIGRAM_LENGTH = 3
+LOOKUP_FIELDS = ('id', 'code', 'name')
+
+
+def _trigram_lookup(term: str, field: str, limit: int) -> List[dict]:
+    # Both the filter (term <% field) and the ordering by distance are served
+    # by the GiST trigram index of the field.
+    return list(
+        Good.objects.filter(**{f'{field}__trigram_word_similar': term})
+                    .annotate(distance=TrigramWordDistance(term, field))
+                    .order_by('distance')
+                    .values(*LOOKUP_FIELDS, 'distance')[:limit]
+    )
+
+
+def lookup_goods_in_db(term: str, limit: int) -> List[dict]:
+    """Goods with the code or the name most similar to the term."""
+    if len(term) < MIN_TRIGRAM_LENGTH:
+        return list(Good.objects.filter(code__startswith=term).order_by('code', 'id')
+                                .values(*LOOKUP_FIELDS)[:limit])
+
+    matches = {}
+    for row in _trigram_lookup(term, 'code', limit) + _trigram_lookup(term, 'name', limit):
+        known = matches.get(row['id'])
+        if known is None or row['distance'] < known['distance']:
+            matches[row['id']] = row
+    rows = sorted(matches.values(), key=lambda row: (row['distance'], row['id']))[:limit]
+    for row in rows:
+        del row['distance']
+    return rows
+
+
+class PrefixIndex:
+    """In-process LRU of lookup results for the most requested terms.
+
+    A term is kept once it has been requested ``min_hits`` times, and the
+    whole index is dropped when the goods version stamp changes.
+    """
+
+    def __init__(self, max_size: int = 2048, min_hits: int = 2):
+        self.max_size = max_size
+        self.min_hits = min_hits
+        self._version = None
+        self._results = OrderedDict()
+        self._hits = Counter()
+        self._lock = threading.Lock()
+
+    def lookup(self, term: str, limit: int) -> List[dict]:
+        version = cache.get_version(cache.GOODS)
+        key = (term, limit)
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._results.clear()
+                self._hits.clear()
+            results = self._results.get(key)
+            if results is not None:
+                self._results.move_to_end(key)
+                return results
+            self._hits[key] += 1
+            keep = self._hits[key] >= self.min_hits
+
+        if keep:
+            # Kept until the next change of the goods, a lagging replica would keep it stale.
+            with primary_reads():
+                results = lookup_goods_in_db(term, limit)
+        else:
+            results = lookup_goods_in_db(term, limit)
+        if keep:
+            with self._lock:
+                if version == self._version:
+                    self._results[key] = results
+                    del self._hits[key]
+                    if len(self._results) > self.max_size:
+                        self._results.popitem(last=False)
+                # Forget terms requested once so the counter stays bounded.
+                if len(self._hits) > self.max_size * 8:
+                    self._hits.clear()
+        return results
+
+
+prefix_index = PrefixIndex()
+
+
+def lookup_goods(term: str, limit: int = 10) -> List[dict]:
+    """Top ``limit`` goods matching a partial or mistyped code or name."""
+    term = term.strip()
+    if not term:
+        return []
+    return prefix_index.lookup(term, limit)
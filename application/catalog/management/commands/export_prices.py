@@ -0,0 +1,27 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from catalog.export import CHUNK_SIZE, EXPORT_FORMATS, export_price_list
+
+
+class Command(BaseCommand):
+    help = 'Exports the price list (good x place x cost) as CSV or JSONL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--output', default='-', help='Output file, "-" writes to the standard output.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Rows fetched from the server-side cursor at once.')
+
+    def handle(self, *args, **options):
+        if options['output'] == '-':
+            output = sys.stdout
+        else:
+            output = open(options['output'], 'w', encoding='utf-8', newline='')
+        try:
+            for chunk in export_price_list(options['format'], options['chunk_size']):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,274 @@
+import csv
+import json
+import os
+import sys
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+
+from catalog.bulk import copy_rows, lookup_map
+from catalog.models import GoodType, Unit, GoodPlace, Currency
+
+
+class RowError(ValueError):
+    """Row of the feed which cannot be imported."""
+
+
+def required(record: dict, name: str) -> str:
+    value = str(record.get(name) or '').strip()
+    if not value:
+        raise RowError(f'"{name}" is empty')
+    return value
+
+
+def number(record: dict, name: str, default=None) -> float:
+    value = record.get(name)
+    if value is None or value == '':
+        if default is None:
+            raise RowError(f'"{name}" is empty')
+        return default
+    try:
+        return float(str(value).replace(',', '.'))
+    except ValueError:
+        raise RowError(f'"{name}" is not a number: {value!r}')
+
+
+def resolve(lookup: dict, record: dict, name: str, model_name: str, optional=False):
+    value = str(record.get(name) or '').strip()
+    if not value and optional:
+        return None
+    try:
+        return lookup[value]
+    except KeyError:
+        raise RowError(f'unknown {model_name} "{value}"')
+
+
+class GoodsImport:
+    """Goods identified by code. Columns: code, name, description, type, unit."""
+    staging_table = 'import_good'
+    staging_columns = ('line', 'code', 'name', 'description', 'type_id', 'unit_id')
+    create_sql = '''
+        CREATE TEMP TABLE import_good (
+            line integer, code varchar(50), name varchar(300), description text,
+            type_id integer, unit_id integer
+        ) ON COMMIT DROP
+    '''
+    # No lines are skipped by the upsert itself.
+    unresolved_sql = None
+    upsert_sql = '''
+        WITH rows AS (
+            SELECT DISTINCT ON (code) code, name, description, type_id, unit_id
+            FROM import_good
+            ORDER BY code, line DESC
+        ), updated AS (
+            UPDATE catalog_good g
+            SET name = r.name, description = r.description, type_id = r.type_id, unit_id = r.unit_id
+            FROM rows r
+            WHERE g.code = r.code
+            RETURNING g.code
+        )
+        INSERT INTO catalog_good (code, name, description, type_id, unit_id)
+        SELECT r.code, r.name, r.description, r.type_id, r.unit_id
+        FROM rows r
+        WHERE NOT EXISTS (SELECT 1 FROM updated u WHERE u.code = r.code)
+    '''
+
+    def __init__(self):
+        self.types = lookup_map(GoodType.objects.all(), 'name')
+        self.units = lookup_map(Unit.objects.all(), 'short_name')
+
+    def convert(self, line: int, record: dict) -> tuple:
+        return (
+            line,
+            required(record, 'code'),
+            required(record, 'name'),
+            record.get('description') or None,
+            resolve(self.types, record, 'type', 'good type', optional=True),
+            resolve(self.units, record, 'unit', 'unit', optional=True),
+        )
+
+
+class CostsImport:
+    """Prices of goods. Columns: good (code), place (name), currency (short name), cost."""
+    staging_table = 'import_goodcost'
+    staging_columns = ('line', 'good_code', 'good_place_id', 'currency_id', 'cost')
+    create_sql = '''
+        CREATE TEMP TABLE import_goodcost (
+            line integer, good_code varchar(50), good_place_id integer, currency_id integer,
+            cost double precision
+        ) ON COMMIT DROP
+    '''
+    unresolved_sql = '''
+        SELECT s.line, s.good_code FROM import_goodcost s
+        WHERE NOT EXISTS (SELECT 1 FROM catalog_good g WHERE g.code = s.good_code)
+        ORDER BY s.line
+    '''
+    # DISTINCT ON: a statement cannot update the same row twice.
+    upsert_sql = '''
+        INSERT INTO catalog_goodcost (good_id, good_place_id, currency_id, cost)
+        SELECT DISTINCT ON (g.id, s.good_place_id, s.currency_id) g.id, s.good_place_id, s.currency_id, s.cost
+        FROM import_goodcost s
+        JOIN catalog_good g ON g.code = s.good_code
+        ORDER BY g.id, s.good_place_id, s.currency_id, s.line DESC
+        ON CONFLICT (good_id, good_place_id, currency_id) DO UPDATE SET cost = EXCLUDED.cost
+    '''
+
+    def __init__(self):
+        self.places = lookup_map(GoodPlace.objects.all(), 'name')
+        self.currencies = lookup_map(Currency.objects.all(), 'short_name')
+
+    def convert(self, line: int, record: dict) -> tuple:
+        return (
+            line,
+            required(record, 'good'),
+            resolve(self.places, record, 'place', 'good place'),
+            resolve(self.currencies, record, 'currency', 'currency'),
+            number(record, 'cost'),
+        )
+
+
+class CountsImport:
+    """Stock of goods. Columns: good (code), place (name), count."""
+    staging_table = 'import_goodcount'
+    staging_columns = ('line', 'good_code', 'good_place_id', 'count')
+    create_sql = '''
+        CREATE TEMP TABLE import_goodcount (
+            line integer, good_code varchar(50), good_place_id integer, count double precision
+        ) ON COMMIT DROP
+    '''
+    unresolved_sql = '''
+        SELECT s.line, s.good_code FROM import_goodcount s
+        WHERE NOT EXISTS (SELECT 1 FROM catalog_good g WHERE g.code = s.good_code)
+        ORDER BY s.line
+    '''
+    upsert_sql = '''
+        INSERT INTO catalog_goodcount (good_id, good_place_id, count)
+        SELECT DISTINCT ON (g.id, s.good_place_id) g.id, s.good_place_id, s.count
+        FROM import_goodcount s
+        JOIN catalog_good g ON g.code = s.good_code
+        ORDER BY g.id, s.good_place_id, s.line DESC
+        ON CONFLICT (good_id, good_place_id) DO UPDATE SET count = EXCLUDED.count
+    '''
+
+    def __init__(self):
+        self.places = lookup_map(GoodPlace.objects.all(), 'name')
+
+    def convert(self, line: int, record: dict) -> tuple:
+        return (
+            line,
+            required(record, 'good'),
+            resolve(self.places, record, 'place', 'good place'),
+            number(record, 'count', default=0.0),
+        )
+
+
+IMPORTS = {
+    'goods': GoodsImport,
+    'costs': CostsImport,
+    'counts': CountsImport,
+}
+
+
+def read_csv(stream):
+    # Line 1 is the header.
+    return enumerate(csv.DictReader(stream), start=2)
+
+
+def read_jsonl(stream):
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as error:
+            record = RowError(f'invalid JSON: {error}')
+        yield line, record
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+}
+
+
+class Command(BaseCommand):
+    help = 'Imports goods, prices or stock from a CSV or JSONL feed through COPY.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=IMPORTS, help='What the feed contains.')
+        parser.add_argument('path', help='Feed file, "-" reads the standard input.')
+        parser.add_argument('--format', choices=READERS,
+                            help='Feed format. By default it is taken from the file extension.')
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Rows loaded and upserted in one transaction.')
+        parser.add_argument('--encoding', default='utf-8')
+
+    def handle(self, *args, **options):
+        feed_format = options['format']
+        if feed_format is None:
+            feed_format = os.path.splitext(options['path'])[1].lstrip('.').lower()
+            if feed_format not in READERS:
+                raise CommandError('Cannot guess the feed format, use --format.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        importer = IMPORTS[options['kind']]()
+        if options['path'] == '-':
+            stream = sys.stdin
+        else:
+            stream = open(options['path'], encoding=options['encoding'], newline='')
+
+        total = imported = failed = 0
+        with stream:
+            records = READERS[feed_format](stream)
+            batch_number = 0
+            while True:
+                batch = list(islice(records, options['batch_size']))
+                if not batch:
+                    break
+                batch_number += 1
+
+                rows = []
+                errors = []
+                for line, record in batch:
+                    try:
+                        if isinstance(record, RowError):
+                            raise record
+                        if not isinstance(record, dict):
+                            raise RowError('a row must be an object')
+                        rows.append(importer.convert(line, record))
+                    except RowError as error:
+                        errors.append((line, str(error)))
+
+                try:
+                    errors += self.load_batch(importer, rows)
+                except DatabaseError as error:
+                    errors += [(row[0], str(error).strip()) for row in rows]
+
+                for line, message in sorted(errors):
+                    self.stderr.write(f'Line {line}: {message}')
+                total += len(batch)
+                failed += len(errors)
+                imported += len(batch) - len(errors)
+                self.stdout.write(f'Batch {batch_number}: {len(batch) - len(errors)} of {len(batch)} rows '
+                                  f'imported ({total} rows read).')
+
+        self.stdout.write(f'{imported} of {total} rows imported.')
+        if failed:
+            raise CommandError(f'{failed} rows were not imported.')
+
+    @staticmethod
+    def load_batch(importer, rows) -> list:
+        """Load the rows into the staging table and upsert them. Returns skipped lines."""
+        if not rows:
+            return []
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(importer.create_sql)
+            copy_rows(cursor, importer.staging_table, importer.staging_columns, rows)
+            unresolved = []
+            if importer.unresolved_sql:
+                cursor.execute(importer.unresolved_sql)
+                unresolved = [(line, f'unknown good "{code}"') for line, code in cursor.fetchall()]
+            cursor.execute(importer.upsert_sql)
+        return unresolved
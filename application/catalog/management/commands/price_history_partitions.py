@@ -0,0 +1,30 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.prices import PARTITION_MONTHS_AHEAD, create_history_partitions
+
+
+class Command(BaseCommand):
+    help = 'Creates the monthly partitions of the price history ahead of time. Run it monthly.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=PARTITION_MONTHS_AHEAD,
+                            help='Months after the current one to create partitions for.')
+        parser.add_argument('--since', help='First month (YYYY-MM) to create a partition for, the current one '
+                                            'by default. Moves the rows of past months out of the default partition.')
+
+    def handle(self, *args, **options):
+        if options['months_ahead'] < 0:
+            raise CommandError('--months-ahead must not be negative.')
+        since = None
+        if options['since']:
+            try:
+                since = datetime.datetime.strptime(options['since'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('--since must be a month: YYYY-MM.')
+
+        created = create_history_partitions(options['months_ahead'], since)
+        for name in created:
+            self.stdout.write(f'Created {name}.')
+        self.stdout.write(f'{len(created)} partitions created.')
@@ -0,0 +1,69 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Fresh processes: a forked one would share the sockets and lose the threads
+# of the connection pools of the parent.
+mp_context = multiprocessing.get_context('spawn')
+
+
+def worker_process(stop, burst):
+    # The parent stops the workers on Ctrl+C, after their current tasks.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    import django
+    django.setup()
+    from catalog.queue import work
+
+    work(stop, burst)
+
+
+class Command(BaseCommand):
+    help = 'Runs the background tasks queued in catalog_task in a pool of worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=multiprocessing.cpu_count(),
+                            help='Worker processes, each runs one task at a time. The number of CPUs by default.')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit when no task is due instead of waiting for new ones.')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be positive.')
+
+        stop = mp_context.Event()
+        processes = []
+
+        def shutdown(signum, frame):
+            if stop.is_set():
+                # The second signal does not wait for the current tasks.
+                for process in processes:
+                    process.kill()
+            stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        for _ in range(options['concurrency']):
+            processes.append(self.start_worker(stop, options['burst']))
+        self.stdout.write(f'Started {len(processes)} workers.')
+        while not stop.is_set() and any(process.is_alive() for process in processes):
+            for number, process in enumerate(processes):
+                if not options['burst'] and process.exitcode is not None:
+                    self.stderr.write(f'Worker {process.pid} exited with {process.exitcode}, restarting it.')
+                    processes[number] = self.start_worker(stop, options['burst'])
+            stop.wait(1)
+
+        self.stdout.write('Waiting for the workers to finish their tasks.')
+        for process in processes:
+            process.join()
+        self.stdout.write('Workers stopped.')
+
+    @staticmethod
+    def start_worker(stop, burst):
+        process = mp_context.Process(target=worker_process, args=(stop, burst), daemon=False)
+        process.start()
+        return process
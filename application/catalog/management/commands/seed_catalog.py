@@ -0,0 +1,201 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from catalog.bulk import copy_rows
+from catalog.models import GoodSubjectArea, GoodCategory, GoodType, Unit, Good, PlaceType, Contact, \
+                           PhoneNumber, Email, Address, GoodPlace, Currency, Employee
+from catalog.normalize import normalize_phone
+
+
+SUBJECT_AREAS = ('Продукты питания', 'Бытовая химия', 'Электроника', 'Канцелярия', 'Строительство',
+                 'Одежда', 'Посуда', 'Спорт', 'Детские товары', 'Автотовары', 'Сад и огород', 'Зоотовары')
+CATEGORY_WORDS = ('Базовые', 'Популярные', 'Сезонные', 'Импортные', 'Местные', 'Премиальные',
+                  'Уценённые', 'Новинки', 'Профессиональные', 'Наборы')
+NOUNS = ('Молоко', 'Хлеб', 'Сыр', 'Кофе', 'Чай', 'Шампунь', 'Мыло', 'Кабель', 'Лампа', 'Батарейка',
+         'Тетрадь', 'Ручка', 'Краска', 'Гвозди', 'Клей', 'Носки', 'Футболка', 'Кружка', 'Тарелка', 'Нож',
+         'Мяч', 'Перчатки', 'Фонарь', 'Корм', 'Семена')
+ADJECTIVES = ('премиум', 'эконом', 'классический', 'новый', 'большой', 'малый', 'белый', 'чёрный',
+              'красный', 'органический', 'усиленный', 'компактный')
+UNITS = (('штука', 'шт'), ('килограмм', 'кг'), ('литр', 'л'), ('метр', 'м'), ('упаковка', 'уп'))
+PLACE_TYPES = ('Склад', 'Магазин', 'Пункт выдачи')
+# Short name, name, units of the currency per ruble.
+CURRENCIES = (('RUB', 'Российский рубль', 1.0), ('USD', 'Доллар США', 1 / 90), ('EUR', 'Евро', 1 / 100))
+# Country, region, city and the coordinates of its center.
+CITIES = (('Россия', 'Московская', 'Москва', 55.756, 37.617),
+          ('Россия', 'Ленинградская', 'Санкт-Петербург', 59.939, 30.316),
+          ('Россия', 'Новосибирская', 'Новосибирск', 55.030, 82.920),
+          ('Россия', 'Свердловская', 'Екатеринбург', 56.838, 60.597), ('Россия', 'Татарстан', 'Казань', 55.796, 49.106),
+          ('Россия', 'Нижегородская', 'Нижний Новгород', 56.327, 44.006),
+          ('Россия', 'Самарская', 'Самара', 53.195, 50.101), ('Россия', 'Ростовская', 'Ростов-на-Дону', 47.222, 39.720))
+STREETS = ('Ленина', 'Мира', 'Садовая', 'Советская', 'Лесная', 'Школьная', 'Новая', 'Центральная')
+FIRST_NAMES = ('Александр', 'Мария', 'Иван', 'Ольга', 'Дмитрий', 'Анна', 'Сергей', 'Елена', 'Павел', 'Наталья')
+LAST_NAMES = ('Иванов', 'Петров', 'Сидоров', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Соколов')
+POSITIONS = ('Продавец', 'Кассир', 'Кладовщик', 'Администратор', 'Управляющий')
+PHONE_FORMATS = ('+7 ({}) {}-{}-{}', '8{}{}{}{}', '+7{}{}{}{}', '8 ({}) {} {} {}')
+
+
+class Command(BaseCommand):
+    help = 'Fills the catalog with a deterministic synthetic dataset for load testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--goods', type=int, default=10000)
+        parser.add_argument('--places', type=int, default=50)
+        parser.add_argument('--coverage', type=float, default=0.5,
+                            help='Share of the goods stocked and priced at every place.')
+        parser.add_argument('--employees-per-place', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0,
+                            help='The same seed produces the same dataset. Goods codes are prefixed with it.')
+
+    def handle(self, *args, **options):
+        if options['goods'] < 1 or options['places'] < 1:
+            raise CommandError('--goods and --places must be positive.')
+        if not 0 < options['coverage'] <= 1:
+            raise CommandError('--coverage must be in (0, 1].')
+        if options['employees_per_place'] < 0:
+            raise CommandError('--employees-per-place must not be negative.')
+
+        self.rng = random.Random(options['seed'])
+        self.prefix = f'S{options["seed"]}-'
+        if Good.objects.filter(code__startswith=self.prefix).exists():
+            raise CommandError(f'The catalog is already seeded with seed {options["seed"]}, use another --seed.')
+
+        with transaction.atomic():
+            types = self.step('Hierarchy', self.create_hierarchy)
+            units, place_types, currencies = self.step('Dictionaries', self.create_dictionaries)
+            good_ids, prices = self.step(f'{options["goods"]} goods', self.create_goods,
+                                         options['goods'], types, units)
+            places = self.step(f'{options["places"]} places', self.create_places,
+                               options['places'], options['employees_per_place'], place_types, currencies)
+            self.step('Prices and stock', self.create_prices_and_stock,
+                      good_ids, prices, places, options['coverage'])
+
+    def step(self, title, function, *args):
+        start = time.monotonic()
+        result = function(*args)
+        self.stdout.write(f'{title}: {time.monotonic() - start:.1f} s')
+        return result
+
+    def create_hierarchy(self):
+        areas = GoodSubjectArea.objects.bulk_create(
+            [GoodSubjectArea(name=name) for name in SUBJECT_AREAS]
+        )
+        categories = GoodCategory.objects.bulk_create(
+            [GoodCategory(subject_area=area, name=f'{word} ({area.name})'[:50])
+             for area in areas for word in CATEGORY_WORDS]
+        )
+        return GoodType.objects.bulk_create(
+            [GoodType(category=category, name=f'{noun} / {category.name}'[:50])
+             for category in categories for noun in self.rng.sample(NOUNS, 5)]
+        )
+
+    def create_dictionaries(self):
+        units = [Unit.objects.get_or_create(short_name=short_name, defaults={'full_name': full_name})[0]
+                 for full_name, short_name in UNITS]
+        place_types = [PlaceType.objects.get_or_create(name=name)[0] for name in PLACE_TYPES]
+        # The rate of a currency to the base one (rubles) is the inverse of the price multiplier.
+        currencies = [(Currency.objects.get_or_create(short_name=short_name,
+                                                      defaults={'name': name, 'rate': 1 / rate})[0], rate)
+                      for short_name, name, rate in CURRENCIES]
+        return units, place_types, currencies
+
+    def create_goods(self, count, types, units):
+        rng = self.rng
+        prices = []
+
+        def rows():
+            for index in range(count):
+                good_type = rng.choice(types)
+                noun = good_type.name.split(' / ')[0]
+                name = f'{noun} {rng.choice(ADJECTIVES)} {rng.randint(1, 999)}'
+                prices.append(round(rng.uniform(10, 10000), 2))
+                yield (good_type.pk, rng.choice(units).pk, name, f'{self.prefix}{index:08d}',
+                       f'{name}. {good_type.category.name}.')
+
+        with connection.cursor() as cursor:
+            copy_rows(cursor, Good._meta.db_table, ('type_id', 'unit_id', 'name', 'code', 'description'), rows())
+        # Zero-padded codes sort in the order the goods were generated.
+        good_ids = list(Good.objects.filter(code__startswith=self.prefix).order_by('code')
+                                    .values_list('id', flat=True))
+        return good_ids, prices
+
+    def create_places(self, count, employees_per_place, place_types, currencies):
+        rng = self.rng
+        people = count * (1 + employees_per_place)
+        contacts = Contact.objects.bulk_create(
+            [Contact(first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES)) for _ in range(people)],
+            batch_size=5000,
+        )
+        addresses = Address.objects.bulk_create(
+            [Address(**self.address()) for _ in range(people)],
+            batch_size=5000,
+        )
+        # bulk_create does not call save(), the normalized values are set here.
+        phone_numbers = [self.phone_number(contact.pk) for contact in contacts]
+        PhoneNumber.objects.bulk_create(
+            [PhoneNumber(contact=contact, phone_number=phone_number, phone_e164=normalize_phone(phone_number))
+             for contact, phone_number in zip(contacts, phone_numbers)],
+            batch_size=5000,
+        )
+        Email.objects.bulk_create(
+            [Email(contact=contact, email=f'User{contact.pk}@Example.com',
+                   email_normalized=f'user{contact.pk}@example.com')
+             for contact in contacts],
+            batch_size=5000,
+        )
+
+        places = GoodPlace.objects.bulk_create(
+            [GoodPlace(place_type=place_type, address=addresses[index], contact=contacts[index],
+                       name=f'{place_type.name} №{index + 1} ({self.prefix[:-1]})')
+             for index, place_type in ((index, rng.choice(place_types)) for index in range(count))],
+            batch_size=5000,
+        )
+        Employee.objects.bulk_create(
+            [Employee(contact=contacts[count + index], address=addresses[count + index],
+                      job_place=places[index // employees_per_place], position_name=rng.choice(POSITIONS))
+             for index in range(count * employees_per_place)],
+            batch_size=5000,
+        )
+        # Every place sells in one currency.
+        return [(place, rng.choice(currencies)) for place in places]
+
+    def address(self):
+        rng = self.rng
+        country, region, city, latitude, longitude = rng.choice(CITIES)
+        return {
+            'country': country, 'region': region, 'city': city, 'street': rng.choice(STREETS),
+            'building': rng.randint(1, 200), 'room': rng.randint(1, 300) if rng.random() < 0.5 else None,
+            # Within about 20 km of the center.
+            'latitude': round(latitude + rng.uniform(-0.18, 0.18), 6),
+            'longitude': round(longitude + rng.uniform(-0.3, 0.3), 6),
+        }
+
+    def phone_number(self, contact_id):
+        # Derived from the contact, the normalized numbers are unique.
+        digits = f'{900 + contact_id % 100}{contact_id // 100 % 10 ** 7:07d}'
+        return self.rng.choice(PHONE_FORMATS).format(digits[:3], digits[3:6], digits[6:8], digits[8:])
+
+    def create_prices_and_stock(self, good_ids, prices, places, coverage):
+        rng = self.rng
+        per_place = max(1, int(len(good_ids) * coverage))
+        # The same goods of every place for the prices and the stock.
+        assortments = [sorted(rng.sample(range(len(good_ids)), per_place)) for _ in places]
+
+        def costs():
+            for (place, (currency, rate)), assortment in zip(places, assortments):
+                factor = rng.uniform(0.9, 1.1)
+                for index in assortment:
+                    yield good_ids[index], place.pk, currency.pk, round(prices[index] * factor * rate, 2)
+
+        def counts():
+            for (place, _), assortment in zip(places, assortments):
+                for index in assortment:
+                    yield good_ids[index], place.pk, 0.0 if rng.random() < 0.1 else float(rng.randint(1, 500))
+
+        # One COPY per table, so the summary triggers refresh every good once.
+        with connection.cursor() as cursor:
+            copy_rows(cursor, 'catalog_goodcost', ('good_id', 'good_place_id', 'currency_id', 'cost'), costs())
+            copy_rows(cursor, 'catalog_goodcount', ('good_id', 'good_place_id', 'count'), counts())
+        self.stdout.write(f'{per_place * len(places)} prices and {per_place * len(places)} stock rows.')
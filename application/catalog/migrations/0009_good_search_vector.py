@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:41
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_VECTOR_SQL = """
+CREATE FUNCTION catalog_good_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.russian', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.simple', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.simple', coalesce(NEW.code, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.russian', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER catalog_good_search_vector
+    BEFORE INSERT OR UPDATE OF name, code, description, search_vector ON catalog_good
+    FOR EACH ROW EXECUTE FUNCTION catalog_good_search_vector();
+
+UPDATE catalog_good SET search_vector = NULL;
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER catalog_good_search_vector ON catalog_good;
+DROP FUNCTION catalog_good_search_vector();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_alter_email_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='good',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+        migrations.AddIndex(
+            model_name='good',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='catalog_good_search_gin'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:42
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_good_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='good',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['code'], name='catalog_good_code_trgm', opclasses=['gist_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='good',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['name'], name='catalog_good_name_trgm', opclasses=['gist_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='good',
+            index=models.Index(fields=['code'], name='catalog_good_code_prefix', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
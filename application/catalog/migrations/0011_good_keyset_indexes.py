@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_good_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='good',
+            index=models.Index(fields=['name', 'id'], name='catalog_good_name_id'),
+        ),
+        migrations.AddIndex(
+            model_name='good',
+            index=models.Index(fields=['type', 'name', 'id'], name='catalog_good_type_name_id'),
+        ),
+    ]
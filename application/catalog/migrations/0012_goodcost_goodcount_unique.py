@@ -0,0 +1,64 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Keep the latest of duplicate rows before adding the unique constraints.
+DELETE_DUPLICATES_SQL = """
+DELETE FROM catalog_goodcost a USING catalog_goodcost b
+WHERE a.good_id = b.good_id AND a.good_place_id = b.good_place_id AND a.currency_id = b.currency_id
+  AND a.id < b.id;
+
+DELETE FROM catalog_goodcount a USING catalog_goodcount b
+WHERE a.good_id = b.good_id AND a.good_place_id = b.good_place_id
+  AND a.id < b.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_good_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DELETE_DUPLICATES_SQL, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='goodcost',
+            constraint=models.UniqueConstraint(fields=('good', 'good_place', 'currency'), name='catalog_goodcost_good_place_currency_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='goodcount',
+            constraint=models.UniqueConstraint(fields=('good', 'good_place'), name='catalog_goodcount_good_place_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='goodcost',
+            index=models.Index(fields=['good_place', 'good'], include=('currency', 'cost'), name='catalog_goodcost_place_good'),
+        ),
+        migrations.AddIndex(
+            model_name='goodcount',
+            index=models.Index(fields=['good_place', 'good'], include=('count',), name='catalog_goodcount_place_good'),
+        ),
+        # The single column indexes are covered by the composite ones.
+        migrations.AlterField(
+            model_name='goodcost',
+            name='good',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='catalog.good', verbose_name='товар'),
+        ),
+        migrations.AlterField(
+            model_name='goodcost',
+            name='good_place',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='catalog.goodplace', verbose_name='месторасположение товара'),
+        ),
+        migrations.AlterField(
+            model_name='goodcount',
+            name='good',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='catalog.good', verbose_name='товар'),
+        ),
+        migrations.AlterField(
+            model_name='goodcount',
+            name='good_place',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='catalog.goodplace', verbose_name='местонахождение'),
+        ),
+    ]
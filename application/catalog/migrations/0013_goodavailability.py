@@ -0,0 +1,132 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+AVAILABILITY_SQL = """
+CREATE FUNCTION catalog_refresh_good_availability(good_ids integer[]) RETURNS void AS $$
+BEGIN
+    -- Serialize the refreshes of a good, so the summary computed last sees
+    -- the changes of all committed transactions (every statement below takes
+    -- a new snapshot).
+    PERFORM pg_advisory_xact_lock(hashtext('catalog_goodavailability'), id)
+    FROM (SELECT DISTINCT unnest(good_ids) AS id) ids
+    WHERE id IS NOT NULL
+    ORDER BY id;
+
+    DELETE FROM catalog_goodavailability a
+    WHERE a.good_id = ANY(good_ids)
+      AND NOT EXISTS (SELECT 1 FROM catalog_goodcount c WHERE c.good_id = a.good_id)
+      AND NOT EXISTS (SELECT 1 FROM catalog_goodcost c WHERE c.good_id = a.good_id);
+
+    INSERT INTO catalog_goodavailability (good_id, total_count, places_count, min_cost, min_cost_currency_id)
+    SELECT g.id, coalesce(s.total_count, 0), coalesce(s.places_count, 0), c.cost, c.currency_id
+    FROM (SELECT DISTINCT unnest(good_ids) AS id) g
+    LEFT JOIN LATERAL (
+        SELECT sum(count) FILTER (WHERE count > 0) AS total_count,
+               count(*) FILTER (WHERE count > 0) AS places_count
+        FROM catalog_goodcount
+        WHERE good_id = g.id
+    ) s ON true
+    LEFT JOIN LATERAL (
+        SELECT cost, currency_id
+        FROM catalog_goodcost
+        WHERE good_id = g.id
+        ORDER BY cost
+        LIMIT 1
+    ) c ON true
+    WHERE EXISTS (SELECT 1 FROM catalog_goodcount WHERE good_id = g.id)
+       OR EXISTS (SELECT 1 FROM catalog_goodcost WHERE good_id = g.id)
+    ON CONFLICT (good_id) DO UPDATE
+    SET total_count = EXCLUDED.total_count,
+        places_count = EXCLUDED.places_count,
+        min_cost = EXCLUDED.min_cost,
+        min_cost_currency_id = EXCLUDED.min_cost_currency_id;
+END
+$$ LANGUAGE plpgsql;
+
+-- Statement level triggers: a bulk write refreshes every affected good once.
+CREATE FUNCTION catalog_good_availability_inserted() RETURNS trigger AS $$
+BEGIN
+    PERFORM catalog_refresh_good_availability(ARRAY(SELECT good_id FROM new_rows));
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION catalog_good_availability_updated() RETURNS trigger AS $$
+BEGIN
+    PERFORM catalog_refresh_good_availability(
+        ARRAY(SELECT good_id FROM new_rows UNION SELECT good_id FROM old_rows)
+    );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION catalog_good_availability_deleted() RETURNS trigger AS $$
+BEGIN
+    PERFORM catalog_refresh_good_availability(ARRAY(SELECT good_id FROM old_rows));
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER catalog_goodcount_availability_insert AFTER INSERT ON catalog_goodcount
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION catalog_good_availability_inserted();
+CREATE TRIGGER catalog_goodcount_availability_update AFTER UPDATE ON catalog_goodcount
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION catalog_good_availability_updated();
+CREATE TRIGGER catalog_goodcount_availability_delete AFTER DELETE ON catalog_goodcount
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION catalog_good_availability_deleted();
+
+CREATE TRIGGER catalog_goodcost_availability_insert AFTER INSERT ON catalog_goodcost
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION catalog_good_availability_inserted();
+CREATE TRIGGER catalog_goodcost_availability_update AFTER UPDATE ON catalog_goodcost
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION catalog_good_availability_updated();
+CREATE TRIGGER catalog_goodcost_availability_delete AFTER DELETE ON catalog_goodcost
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION catalog_good_availability_deleted();
+
+SELECT catalog_refresh_good_availability(ARRAY(SELECT id FROM catalog_good));
+"""
+
+DROP_AVAILABILITY_SQL = """
+DROP TRIGGER catalog_goodcount_availability_insert ON catalog_goodcount;
+DROP TRIGGER catalog_goodcount_availability_update ON catalog_goodcount;
+DROP TRIGGER catalog_goodcount_availability_delete ON catalog_goodcount;
+DROP TRIGGER catalog_goodcost_availability_insert ON catalog_goodcost;
+DROP TRIGGER catalog_goodcost_availability_update ON catalog_goodcost;
+DROP TRIGGER catalog_goodcost_availability_delete ON catalog_goodcost;
+DROP FUNCTION catalog_good_availability_inserted();
+DROP FUNCTION catalog_good_availability_updated();
+DROP FUNCTION catalog_good_availability_deleted();
+DROP FUNCTION catalog_refresh_good_availability(integer[]);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0012_goodcost_goodcount_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GoodAvailability',
+            fields=[
+                ('good', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='availability', serialize=False, to='catalog.good', verbose_name='товар')),
+                ('total_count', models.FloatField(default=0.0, verbose_name='общее количество')),
+                ('places_count', models.IntegerField(default=0, verbose_name='количество мест с товаром')),
+                ('min_cost', models.FloatField(null=True, verbose_name='минимальная цена')),
+                ('min_cost_currency', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='catalog.currency', verbose_name='валюта минимальной цены')),
+            ],
+            options={
+                'verbose_name': 'наличие товара',
+                'verbose_name_plural': 'наличие товаров',
+            },
+        ),
+        migrations.RunSQL(AVAILABILITY_SQL, DROP_AVAILABILITY_SQL),
+    ]
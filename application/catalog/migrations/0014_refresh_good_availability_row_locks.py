@@ -0,0 +1,66 @@
+from django.db import migrations
+
+
+# The refreshes of a good were serialized with an advisory lock per good,
+# and a bulk write touching more goods than the shared lock table holds
+# failed with "out of shared memory". Row locks of the summary rows are
+# stored in the rows themselves.
+REFRESH_SQL = """
+CREATE OR REPLACE FUNCTION catalog_refresh_good_availability(good_ids integer[]) RETURNS void AS $$
+BEGIN
+    -- Lock the summary rows of the goods, creating the missing ones, so that
+    -- the summary computed last sees the changes of all committed
+    -- transactions (every statement below takes a new snapshot).
+    INSERT INTO catalog_goodavailability (good_id, total_count, places_count)
+    SELECT g.id, 0, 0
+    FROM catalog_good g
+    WHERE g.id = ANY(good_ids)
+    ORDER BY g.id
+    ON CONFLICT (good_id) DO NOTHING;
+
+    PERFORM 1
+    FROM catalog_goodavailability
+    WHERE good_id = ANY(good_ids)
+    ORDER BY good_id
+    FOR UPDATE;
+
+    UPDATE catalog_goodavailability a
+    SET total_count = coalesce(s.total_count, 0),
+        places_count = s.places_count,
+        min_cost = c.cost,
+        min_cost_currency_id = c.currency_id
+    FROM (SELECT DISTINCT unnest(good_ids) AS id) g
+    CROSS JOIN LATERAL (
+        SELECT sum(count) FILTER (WHERE count > 0) AS total_count,
+               count(*) FILTER (WHERE count > 0) AS places_count
+        FROM catalog_goodcount
+        WHERE good_id = g.id
+    ) s
+    LEFT JOIN LATERAL (
+        SELECT cost, currency_id
+        FROM catalog_goodcost
+        WHERE good_id = g.id
+        ORDER BY cost
+        LIMIT 1
+    ) c ON true
+    WHERE a.good_id = g.id;
+
+    DELETE FROM catalog_goodavailability a
+    WHERE a.good_id = ANY(good_ids)
+      AND NOT EXISTS (SELECT 1 FROM catalog_goodcount c WHERE c.good_id = a.good_id)
+      AND NOT EXISTS (SELECT 1 FROM catalog_goodcost c WHERE c.good_id = a.good_id);
+END
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0013_goodavailability'),
+    ]
+
+    operations = [
+        # The previous version is not restored, this one works with 0013 as well.
+        migrations.RunSQL(REFRESH_SQL, migrations.RunSQL.noop),
+    ]
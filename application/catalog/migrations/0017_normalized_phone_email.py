@@ -0,0 +1,87 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:57
+
+import re
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 5000
+
+# catalog.normalize as of this migration, later changes to it must not change what it does.
+DEFAULT_COUNTRY_CODE = '7'
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone(phone_number):
+    phone_number = (phone_number or '').strip()
+    digits = _NON_DIGITS.sub('', phone_number)
+    if phone_number.startswith('00'):
+        digits = digits[2:]
+    elif not phone_number.startswith('+'):
+        if len(digits) == 11 and digits.startswith('8'):
+            digits = DEFAULT_COUNTRY_CODE + digits[1:]
+        elif len(digits) == 10:
+            digits = DEFAULT_COUNTRY_CODE + digits
+    # E.164 allows at most 15 digits, country codes do not start with 0.
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return None
+    return f'+{digits}'
+
+
+def normalize_email(email):
+    email = (email or '').strip().lower()
+    local, _, domain = email.rpartition('@')
+    if not local or not domain or ' ' in email:
+        return None
+    return email
+
+
+def backfill(model, source, target, normalize):
+    """Normalize the existing values. Of duplicates only the oldest row gets the normalized value."""
+    seen = set()
+    batch = []
+    for row in model.objects.only('id', source).order_by('id').iterator(chunk_size=BATCH_SIZE):
+        value = normalize(getattr(row, source))
+        if value is None or value in seen:
+            continue
+        seen.add(value)
+        setattr(row, target, value)
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_update(batch, [target])
+            batch = []
+    model.objects.bulk_update(batch, [target])
+
+
+def backfill_normalized(apps, schema_editor):
+    backfill(apps.get_model('catalog', 'PhoneNumber'), 'phone_number', 'phone_e164', normalize_phone)
+    backfill(apps.get_model('catalog', 'Email'), 'email', 'email_normalized', normalize_email)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0016_address_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='email',
+            name='email_normalized',
+            field=models.CharField(editable=False, max_length=100, null=True, verbose_name='нормализованный адрес'),
+        ),
+        migrations.AddField(
+            model_name='phonenumber',
+            name='phone_e164',
+            field=models.CharField(editable=False, max_length=16, null=True, verbose_name='номер в формате E.164'),
+        ),
+        migrations.RunPython(backfill_normalized, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='email',
+            constraint=models.UniqueConstraint(fields=('email_normalized',), name='catalog_email_normalized_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='phonenumber',
+            constraint=models.UniqueConstraint(fields=('phone_e164',), name='catalog_phonenumber_e164_uniq'),
+        ),
+    ]
@@ -0,0 +1,138 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:59
+
+from django.db import migrations, models
+
+
+HISTORY_SQL = """
+CREATE TABLE catalog_goodcosthistory (
+    id bigserial,
+    good_id integer,
+    good_place_id integer,
+    currency_id integer,
+    cost double precision,
+    changed_at timestamp with time zone NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, changed_at)
+) PARTITION BY RANGE (changed_at);
+
+-- Created on every partition. BRIN for the scans of time ranges, B-trees
+-- for the price of a good at a place as of a moment and the series of a good.
+CREATE INDEX catalog_goodcosthistory_changed_brin ON catalog_goodcosthistory USING brin (changed_at);
+CREATE INDEX catalog_goodcosthistory_good_place ON catalog_goodcosthistory (good_id, good_place_id, changed_at);
+CREATE INDEX catalog_goodcosthistory_good ON catalog_goodcosthistory (good_id, changed_at);
+
+-- Rows of the months without a partition.
+CREATE TABLE catalog_goodcosthistory_default PARTITION OF catalog_goodcosthistory DEFAULT;
+
+-- Creates the partition of the month (in UTC) of the given date unless it exists,
+-- moving the rows of the month from the default partition into it.
+CREATE FUNCTION catalog_goodcosthistory_create_partition(in_month date) RETURNS text AS $$
+DECLARE
+    start_at timestamp with time zone := date_trunc('month', in_month)::timestamp AT TIME ZONE 'UTC';
+    end_at timestamp with time zone := (date_trunc('month', in_month) + interval '1 month')::timestamp AT TIME ZONE 'UTC';
+    partition_name text := 'catalog_goodcosthistory_' || to_char(in_month, '"y"YYYY"m"MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE catalog_goodcosthistory INCLUDING DEFAULTS)', partition_name);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM catalog_goodcosthistory_default '
+        'WHERE changed_at >= %L AND changed_at < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        start_at, end_at, partition_name
+    );
+    EXECUTE format('ALTER TABLE catalog_goodcosthistory ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                   partition_name, start_at, end_at);
+    RETURN partition_name;
+END
+$$ LANGUAGE plpgsql;
+
+SELECT catalog_goodcosthistory_create_partition(((now() AT TIME ZONE 'UTC') + make_interval(months => m))::date)
+FROM generate_series(0, 2) m;
+
+-- Statement level triggers, like the availability ones.
+CREATE FUNCTION catalog_goodcost_history_inserted() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO catalog_goodcosthistory (good_id, good_place_id, currency_id, cost)
+    SELECT good_id, good_place_id, currency_id, cost FROM new_rows;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION catalog_goodcost_history_updated() RETURNS trigger AS $$
+BEGIN
+    -- A price moved to another good, place or currency is removed from the old one.
+    INSERT INTO catalog_goodcosthistory (good_id, good_place_id, currency_id, cost)
+    SELECT o.good_id, o.good_place_id, o.currency_id, NULL
+    FROM new_rows n
+    JOIN old_rows o ON o.id = n.id
+    WHERE (n.good_id, n.good_place_id, n.currency_id) IS DISTINCT FROM (o.good_id, o.good_place_id, o.currency_id);
+
+    INSERT INTO catalog_goodcosthistory (good_id, good_place_id, currency_id, cost)
+    SELECT n.good_id, n.good_place_id, n.currency_id, n.cost
+    FROM new_rows n
+    JOIN old_rows o ON o.id = n.id
+    WHERE (n.good_id, n.good_place_id, n.currency_id, n.cost)
+          IS DISTINCT FROM (o.good_id, o.good_place_id, o.currency_id, o.cost);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION catalog_goodcost_history_deleted() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO catalog_goodcosthistory (good_id, good_place_id, currency_id, cost)
+    SELECT good_id, good_place_id, currency_id, NULL FROM old_rows;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER catalog_goodcost_history_insert AFTER INSERT ON catalog_goodcost
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION catalog_goodcost_history_inserted();
+CREATE TRIGGER catalog_goodcost_history_update AFTER UPDATE ON catalog_goodcost
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION catalog_goodcost_history_updated();
+CREATE TRIGGER catalog_goodcost_history_delete AFTER DELETE ON catalog_goodcost
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION catalog_goodcost_history_deleted();
+
+-- The current prices start the history.
+INSERT INTO catalog_goodcosthistory (good_id, good_place_id, currency_id, cost)
+SELECT good_id, good_place_id, currency_id, cost FROM catalog_goodcost;
+"""
+
+DROP_HISTORY_SQL = """
+DROP TRIGGER catalog_goodcost_history_insert ON catalog_goodcost;
+DROP TRIGGER catalog_goodcost_history_update ON catalog_goodcost;
+DROP TRIGGER catalog_goodcost_history_delete ON catalog_goodcost;
+DROP FUNCTION catalog_goodcost_history_inserted();
+DROP FUNCTION catalog_goodcost_history_updated();
+DROP FUNCTION catalog_goodcost_history_deleted();
+DROP FUNCTION catalog_goodcosthistory_create_partition(date);
+DROP TABLE catalog_goodcosthistory;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0017_normalized_phone_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GoodCostHistory',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('cost', models.FloatField(null=True, verbose_name='цена товара')),
+                ('changed_at', models.DateTimeField(verbose_name='время изменения')),
+            ],
+            options={
+                'verbose_name': 'изменение цены товара',
+                'verbose_name_plural': 'история цен на товары',
+                'db_table': 'catalog_goodcosthistory',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(HISTORY_SQL, DROP_HISTORY_SQL),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+CATEGORY_PATH_SQL = """
+-- '/<subject area>/<category>/<type>/', an empty level when it is not set.
+CREATE FUNCTION catalog_category_path(type_id integer) RETURNS varchar AS $$
+    SELECT '/' || coalesce(c.subject_area_id::text, '') || '/' || coalesce(t.category_id::text, '') || '/' || t.id || '/'
+    FROM catalog_goodtype t
+    LEFT JOIN catalog_goodcategory c ON c.id = t.category_id
+    WHERE t.id = type_id
+$$ LANGUAGE sql STABLE;
+
+CREATE FUNCTION catalog_good_category_path() RETURNS trigger AS $$
+BEGIN
+    NEW.category_path := catalog_category_path(NEW.type_id);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER catalog_good_category_path
+    BEFORE INSERT OR UPDATE OF type_id, category_path ON catalog_good
+    FOR EACH ROW EXECUTE FUNCTION catalog_good_category_path();
+
+-- A type or a category moved to another parent moves the goods under it.
+CREATE FUNCTION catalog_goodtype_category_path() RETURNS trigger AS $$
+BEGIN
+    UPDATE catalog_good SET category_path = NULL WHERE type_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER catalog_goodtype_category_path
+    AFTER UPDATE OF category_id ON catalog_goodtype
+    FOR EACH ROW WHEN (OLD.category_id IS DISTINCT FROM NEW.category_id)
+    EXECUTE FUNCTION catalog_goodtype_category_path();
+
+CREATE FUNCTION catalog_goodcategory_category_path() RETURNS trigger AS $$
+BEGIN
+    UPDATE catalog_good SET category_path = NULL
+    WHERE type_id IN (SELECT id FROM catalog_goodtype WHERE category_id = NEW.id);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER catalog_goodcategory_category_path
+    AFTER UPDATE OF subject_area_id ON catalog_goodcategory
+    FOR EACH ROW WHEN (OLD.subject_area_id IS DISTINCT FROM NEW.subject_area_id)
+    EXECUTE FUNCTION catalog_goodcategory_category_path();
+
+UPDATE catalog_good SET category_path = NULL WHERE type_id IS NOT NULL;
+"""
+
+DROP_CATEGORY_PATH_SQL = """
+DROP TRIGGER catalog_goodcategory_category_path ON catalog_goodcategory;
+DROP TRIGGER catalog_goodtype_category_path ON catalog_goodtype;
+DROP TRIGGER catalog_good_category_path ON catalog_good;
+DROP FUNCTION catalog_goodcategory_category_path();
+DROP FUNCTION catalog_goodtype_category_path();
+DROP FUNCTION catalog_good_category_path();
+DROP FUNCTION catalog_category_path(integer);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0018_goodcosthistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='good',
+            name='category_path',
+            field=models.CharField(editable=False, max_length=40, null=True, verbose_name='путь в каталоге'),
+        ),
+        migrations.RunSQL(CATEGORY_PATH_SQL, DROP_CATEGORY_PATH_SQL),
+        migrations.AddIndex(
+            model_name='good',
+            index=models.Index(fields=['category_path'], name='catalog_good_category_path', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:17
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+
+# The cheapest price of a good is chosen by its value in the base currency,
+# not by the raw amounts of different currencies.
+REFRESH_SQL = """
+CREATE OR REPLACE FUNCTION catalog_refresh_good_availability(good_ids integer[]) RETURNS void AS $$
+BEGIN
+    -- Lock the summary rows of the goods, creating the missing ones, so that
+    -- the summary computed last sees the changes of all committed
+    -- transactions (every statement below takes a new snapshot).
+    INSERT INTO catalog_goodavailability (good_id, total_count, places_count)
+    SELECT g.id, 0, 0
+    FROM catalog_good g
+    WHERE g.id = ANY(good_ids)
+    ORDER BY g.id
+    ON CONFLICT (good_id) DO NOTHING;
+
+    PERFORM 1
+    FROM catalog_goodavailability
+    WHERE good_id = ANY(good_ids)
+    ORDER BY good_id
+    FOR UPDATE;
+
+    UPDATE catalog_goodavailability a
+    SET total_count = coalesce(s.total_count, 0),
+        places_count = s.places_count,
+        min_cost = c.cost,
+        min_cost_currency_id = c.currency_id,
+        min_cost_base = c.cost_base
+    FROM (SELECT DISTINCT unnest(good_ids) AS id) g
+    CROSS JOIN LATERAL (
+        SELECT sum(count) FILTER (WHERE count > 0) AS total_count,
+               count(*) FILTER (WHERE count > 0) AS places_count
+        FROM catalog_goodcount
+        WHERE good_id = g.id
+    ) s
+    LEFT JOIN LATERAL (
+        -- Prices in currencies without a rate cannot be compared, they come last.
+        SELECT gc.cost, gc.currency_id, gc.cost * cur.rate AS cost_base
+        FROM catalog_goodcost gc
+        LEFT JOIN catalog_currency cur ON cur.id = gc.currency_id
+        WHERE gc.good_id = g.id
+        ORDER BY gc.cost * cur.rate NULLS LAST, gc.cost
+        LIMIT 1
+    ) c ON true
+    WHERE a.good_id = g.id;
+
+    DELETE FROM catalog_goodavailability a
+    WHERE a.good_id = ANY(good_ids)
+      AND NOT EXISTS (SELECT 1 FROM catalog_goodcount c WHERE c.good_id = a.good_id)
+      AND NOT EXISTS (SELECT 1 FROM catalog_goodcost c WHERE c.good_id = a.good_id);
+END
+$$ LANGUAGE plpgsql;
+
+-- A new rate changes which price of the goods priced in the currency is the
+-- cheapest. A trigger with transition tables cannot list the columns.
+CREATE FUNCTION catalog_currency_rate_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM catalog_refresh_good_availability(
+        ARRAY(SELECT DISTINCT c.good_id
+              FROM new_rows n
+              JOIN old_rows o ON o.id = n.id
+              JOIN catalog_goodcost c ON c.currency_id = n.id
+              WHERE n.rate IS DISTINCT FROM o.rate)
+    );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER catalog_currency_rate_update AFTER UPDATE ON catalog_currency
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION catalog_currency_rate_changed();
+"""
+
+DROP_REFRESH_SQL = """
+DROP TRIGGER catalog_currency_rate_update ON catalog_currency;
+DROP FUNCTION catalog_currency_rate_changed();
+""" + import_module('catalog.migrations.0014_refresh_good_availability_row_locks').REFRESH_SQL
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0020_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='currency',
+            name='rate',
+            field=models.FloatField(blank=True, null=True, verbose_name='курс к базовой валюте'),
+        ),
+        migrations.AddField(
+            model_name='goodavailability',
+            name='min_cost_base',
+            field=models.FloatField(null=True, verbose_name='минимальная цена в базовой валюте'),
+        ),
+        # The summaries are refreshed when the rates are set.
+        migrations.RunSQL(REFRESH_SQL, DROP_REFRESH_SQL),
+    ]
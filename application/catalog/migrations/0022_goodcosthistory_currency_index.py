@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+# The latest price of a good at a place in a currency as of a moment is one
+# probe of this index per partition (see catalog.prices.prices_as_of).
+# Created on the partitioned table, it is created on every partition.
+INDEX_SQL = """
+CREATE INDEX catalog_goodcosthistory_good_place_currency
+    ON catalog_goodcosthistory (good_id, good_place_id, currency_id, changed_at DESC, id DESC);
+"""
+
+DROP_INDEX_SQL = """
+DROP INDEX catalog_goodcosthistory_good_place_currency;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0021_currency_rate'),
+    ]
+
+    operations = [
+        migrations.RunSQL(INDEX_SQL, DROP_INDEX_SQL),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# The unique constraints and ON CONFLICT of set_cost/set_count treat NULLs as
+# distinct, so rows with a NULL key could be duplicated. Such rows price or
+# count nothing identifiable and are deleted before the columns become NOT NULL.
+DELETE_NULL_KEYS_SQL = """
+DELETE FROM catalog_goodcost WHERE good_id IS NULL OR good_place_id IS NULL OR currency_id IS NULL;
+DELETE FROM catalog_goodcount WHERE good_id IS NULL OR good_place_id IS NULL;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0022_goodcosthistory_currency_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DELETE_NULL_KEYS_SQL, migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='goodcost',
+            name='currency',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='catalog.currency', verbose_name='валюта'),
+        ),
+        migrations.AlterField(
+            model_name='goodcost',
+            name='good',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='catalog.good', verbose_name='товар'),
+        ),
+        migrations.AlterField(
+            model_name='goodcost',
+            name='good_place',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='catalog.goodplace', verbose_name='месторасположение товара'),
+        ),
+        migrations.AlterField(
+            model_name='goodcount',
+            name='good',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='catalog.good', verbose_name='товар'),
+        ),
+        migrations.AlterField(
+            model_name='goodcount',
+            name='good_place',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='catalog.goodplace', verbose_name='местонахождение'),
+        ),
+    ]
@@ -1,4 +1,78 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, GistIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
+from django.db import connections, models, router
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+from .normalize import normalize_email, normalize_phone
+
+
+class SelectRelatedManager(models.Manager):
+    """Manager which joins the given relations to every query."""
+
+    def __init__(self, *related, defer=()):
+        super().__init__()
+        self.related = related
+        self.deferred = defer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.related:
+            queryset = queryset.select_related(*self.related)
+        if self.deferred:
+            queryset = queryset.defer(*self.deferred)
+        return queryset
+
+
+def _pk(value):
+    """Primary key of a model instance or the value itself."""
+    return value.pk if isinstance(value, models.Model) else value
+
+
+def related_str(instance: models.Model, field_name: str) -> str:
+    """String of a related object which never triggers a lazy query.
+
+    If the relation has not been loaded, the primary key is shown instead.
+    """
+    field = instance._meta.get_field(field_name)
+    if field.is_cached(instance):
+        return str(field.get_cached_value(instance))
+    return f'#{getattr(instance, field.attname)}'
+
+
+def _save_normalized(instance: models.Model, source: str, target: str, normalize, update_fields):
+    """Store the normalized value of the ``source`` field in ``target``.
+
+    Returns ``update_fields`` of the save, including ``target`` if needed.
+    """
+    setattr(instance, target, normalize(getattr(instance, source)))
+    if update_fields is not None and source in update_fields:
+        update_fields = {*update_fields, target}
+    return update_fields
+
+
+def _clean_normalized(instance: models.Model, source: str, target: str, normalize, invalid: str, duplicate: str):
+    """Validate the ``source`` field by its normalized value, which must be unique.
+
+    The normalized field is not editable, so the form does not check its
+    uniqueness, a duplicate would fail on save with IntegrityError.
+    """
+    value = normalize(getattr(instance, source))
+    if value is None:
+        raise ValidationError({source: invalid})
+    if type(instance)._default_manager.filter(**{target: value}).exclude(pk=instance.pk).exists():
+        raise ValidationError({source: duplicate})
+    setattr(instance, target, value)
+
+
+def icontains_index(field_name: str, name: str) -> GinIndex:
+    """Trigram index serving ``icontains`` and ``istartswith`` lookups of the field.
+
+    Django compares ``UPPER(field)`` on PostgreSQL, so the index is built on
+    the same expression. Used by the admin search.
+    """
+    return GinIndex(OpClass(Upper(field_name), name='gin_trgm_ops'), name=name)
 
 
 class GoodSubjectArea(models.Model):
@@ -19,8 +93,10 @@ class GoodCategory(models.Model):
                                      null=True)
     name = models.CharField(max_length=50)
 
+    objects = SelectRelatedManager('subject_area')
+
     def __str__(self):
-        return f'{self.name}; Предметная область: {self.subject_area.name}'
+        return f'{self.name}; Предметная область: {related_str(self, "subject_area")}'
 
     class Meta:
         verbose_name_plural = 'категории товаров'
@@ -32,8 +108,10 @@ class GoodType(models.Model):
     category = models.ForeignKey(GoodCategory, on_delete=models.PROTECT, null=True)
     name = models.CharField(max_length=50)
 
+    objects = SelectRelatedManager('category__subject_area')
+
     def __str__(self):
-        return f'{self.name}; Категория: {self.category}'
+        return f'{self.name}; Категория: {related_str(self, "category")}'
 
     class Meta:
         verbose_name_plural = 'типы товаров'
@@ -60,6 +138,14 @@ class Good(models.Model):
     name = models.CharField(max_length=300, verbose_name='наименовние')
     code = models.CharField(max_length=50, verbose_name='код')
     description = models.TextField(verbose_name='описание товара', null=True)
+    # Filled by the catalog_good_search_vector trigger on every write.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # '/<subject area>/<category>/<type>/' of the type, filled by the catalog_good_category_path
+    # trigger and kept current by the triggers of the types and categories. A subtree is a prefix.
+    category_path = models.CharField(max_length=40, null=True, editable=False, verbose_name='путь в каталоге')
+
+    # The search vector is used only inside the database.
+    objects = SelectRelatedManager(defer=('search_vector',))
 
     def __str__(self):
         return self.name
@@ -67,6 +153,18 @@ class Good(models.Model):
     class Meta:
         verbose_name_plural = 'товары'
         verbose_name = 'товар'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='catalog_good_search_gin'),
+            GistIndex(fields=['code'], opclasses=['gist_trgm_ops'], name='catalog_good_code_trgm'),
+            GistIndex(fields=['name'], opclasses=['gist_trgm_ops'], name='catalog_good_name_trgm'),
+            models.Index(fields=['code'], opclasses=['varchar_pattern_ops'], name='catalog_good_code_prefix'),
+            # Keyset pagination of the goods API.
+            models.Index(fields=['name', 'id'], name='catalog_good_name_id'),
+            models.Index(fields=['type', 'name', 'id'], name='catalog_good_type_name_id'),
+            icontains_index('name', 'catalog_good_name_upper_trgm'),
+            models.Index(fields=['category_path'], name='catalog_good_category_path',
+                         opclasses=['varchar_pattern_ops']),
+        ]
 
 
 class PlaceType(models.Model):
@@ -95,32 +193,63 @@ class Contact(models.Model):
     class Meta:
         verbose_name_plural = 'контакты'
         verbose_name = 'контакт'
+        indexes = [
+            icontains_index('last_name', 'catalog_contact_last_trgm'),
+            icontains_index('first_name', 'catalog_contact_first_trgm'),
+        ]
 
 
 class PhoneNumber(models.Model):
     """Phone numbers of employees, clients and so on."""
     contact = models.ForeignKey(Contact, verbose_name='контакт', on_delete=models.PROTECT, null=True)
     phone_number = models.CharField(max_length=30, verbose_name='номер телефона')
+    # Filled on save, see catalog.normalize.
+    phone_e164 = models.CharField(max_length=16, null=True, editable=False, verbose_name='номер в формате E.164')
 
     def __str__(self):
         return self.phone_number
 
+    def clean(self):
+        _clean_normalized(self, 'phone_number', 'phone_e164', normalize_phone,
+                          'Это не номер телефона.', 'Такой номер телефона уже есть.')
+
+    def save(self, *args, update_fields=None, **kwargs):
+        update_fields = _save_normalized(self, 'phone_number', 'phone_e164', normalize_phone, update_fields)
+        super().save(*args, update_fields=update_fields, **kwargs)
+
     class Meta:
         verbose_name_plural = 'номера телефонов'
         verbose_name = 'номер телефона'
+        constraints = [
+            models.UniqueConstraint(fields=['phone_e164'], name='catalog_phonenumber_e164_uniq'),
+        ]
 
 
 class Email(models.Model):
     """Addresses of employees, clients and so on."""
     contact = models.ForeignKey(Contact, verbose_name='контакт', on_delete=models.PROTECT, null=True)
     email = models.CharField(max_length=100, verbose_name='электронная почта')
+    # Filled on save, see catalog.normalize.
+    email_normalized = models.CharField(max_length=100, null=True, editable=False,
+                                        verbose_name='нормализованный адрес')
 
     def __str__(self):
         return self.email
 
+    def clean(self):
+        _clean_normalized(self, 'email', 'email_normalized', normalize_email,
+                          'Это не адрес электронной почты.', 'Такой адрес электронной почты уже есть.')
+
+    def save(self, *args, update_fields=None, **kwargs):
+        update_fields = _save_normalized(self, 'email', 'email_normalized', normalize_email, update_fields)
+        super().save(*args, update_fields=update_fields, **kwargs)
+
     class Meta:
         verbose_name_plural = 'адреса электронной почты'
         verbose_name = 'адрес электронной почты'
+        constraints = [
+            models.UniqueConstraint(fields=['email_normalized'], name='catalog_email_normalized_uniq'),
+        ]
 
 
 class Url(models.Model):
@@ -147,6 +276,9 @@ class Address(models.Model):
     entrance = models.IntegerField(blank=True, verbose_name='подъезд', null=True)
     floor = models.IntegerField(blank=True, verbose_name='этаж', null=True)
     room = models.IntegerField(blank=True, verbose_name='помещение', null=True)
+    # WGS 84 degrees, see catalog.geo.
+    latitude = models.FloatField(blank=True, null=True, verbose_name='широта')
+    longitude = models.FloatField(blank=True, null=True, verbose_name='долгота')
 
     def __str__(self):
         return f'{f"{self.country}" if self.country else ""}' \
@@ -162,6 +294,12 @@ class Address(models.Model):
     class Meta:
         verbose_name_plural = 'адреса'
         verbose_name = 'адрес'
+        indexes = [
+            # Bounding box searches of catalog.geo.
+            models.Index(fields=['latitude', 'longitude'], name='catalog_address_lat_lon'),
+            icontains_index('city', 'catalog_address_city_trgm'),
+            icontains_index('street', 'catalog_address_street_trgm'),
+        ]
 
 
 class GoodPlace(models.Model):
@@ -177,11 +315,16 @@ class GoodPlace(models.Model):
     class Meta:
         verbose_name_plural = 'места расположения товаров'
         verbose_name = 'место расположения товара'
+        indexes = [
+            icontains_index('name', 'catalog_goodplace_name_trgm'),
+        ]
 
 
 class Currency(models.Model):
     name = models.CharField(max_length=50, verbose_name='наименование валюты')
     short_name = models.CharField(max_length=3, verbose_name='код')
+    # Prices in different currencies are compared in the base currency, the one with the rate 1.
+    rate = models.FloatField(null=True, blank=True, verbose_name='курс к базовой валюте')
 
     def __str__(self):
         return f'{self.short_name} - {self.name}'
@@ -191,34 +334,161 @@ class Currency(models.Model):
         verbose_name = 'валюта'
 
 
+class GoodCostQuerySet(models.QuerySet):
+
+    def set_cost(self, good, good_place, currency, cost: float) -> None:
+        """Insert or update the price of the good at the place in one statement.
+
+        Goods, places and currencies can be given as instances or primary keys.
+        """
+        self.bulk_create(
+            [self.model(good_id=_pk(good), good_place_id=_pk(good_place), currency_id=_pk(currency), cost=cost)],
+            update_conflicts=True,
+            unique_fields=['good', 'good_place', 'currency'],
+            update_fields=['cost'],
+        )
+
+
 class GoodCost(models.Model):
     """Сведения о ценах на товар в разных магазинах."""
+    # Indexed by the unique constraint and the index of the places.
     good_place = models.ForeignKey(GoodPlace, verbose_name='месторасположение товара', on_delete=models.PROTECT,
-                                   null=True)
-    good = models.ForeignKey(Good, verbose_name='товар', on_delete=models.PROTECT, null=True)
-    currency = models.ForeignKey(Currency, verbose_name='валюта', on_delete=models.PROTECT, null=True)
+                                   db_index=False)
+    good = models.ForeignKey(Good, verbose_name='товар', on_delete=models.PROTECT, db_index=False)
+    currency = models.ForeignKey(Currency, verbose_name='валюта', on_delete=models.PROTECT)
     cost = models.FloatField(verbose_name='цена товара')
 
+    objects = SelectRelatedManager.from_queryset(GoodCostQuerySet)('good', 'good_place',
+                                                                   defer=('good__search_vector',))
+
     def __str__(self):
-        return f'{self.good_place}\n{self.good.name}\nСтоимость: {self.cost}'
+        return f'{related_str(self, "good_place")}\n{related_str(self, "good")}\nСтоимость: {self.cost}'
 
     class Meta:
         verbose_name_plural = 'цены на товары'
         verbose_name = 'цена товара'
+        constraints = [
+            models.UniqueConstraint(fields=['good', 'good_place', 'currency'],
+                                    name='catalog_goodcost_good_place_currency_uniq'),
+        ]
+        indexes = [
+            # Covers the listing of prices at a place.
+            models.Index(fields=['good_place', 'good'], include=['currency', 'cost'],
+                         name='catalog_goodcost_place_good'),
+        ]
+
+
+class GoodCostHistory(models.Model):
+    """История цен на товары.
+
+    Строки добавляются триггерами catalog_goodcost при каждом изменении
+    цены и не изменяются. Таблица секционирована по месяцам changed_at
+    (см. команду price_history_partitions) и создана миграцией, а не Django.
+    """
+    id = models.BigAutoField(primary_key=True)
+    # No foreign key constraints: the history outlives the goods, places and currencies.
+    good = models.ForeignKey(Good, verbose_name='товар', on_delete=models.DO_NOTHING, null=True,
+                             db_constraint=False, related_name='+')
+    good_place = models.ForeignKey(GoodPlace, verbose_name='месторасположение товара', on_delete=models.DO_NOTHING,
+                                   null=True, db_constraint=False, related_name='+')
+    currency = models.ForeignKey(Currency, verbose_name='валюта', on_delete=models.DO_NOTHING, null=True,
+                                 db_constraint=False, related_name='+')
+    # NULL when the price has been removed.
+    cost = models.FloatField(null=True, verbose_name='цена товара')
+    changed_at = models.DateTimeField(verbose_name='время изменения')
+
+    def __str__(self):
+        return f'{related_str(self, "good_place")}\n{related_str(self, "good")}\nСтоимость: {self.cost} ' \
+               f'({self.changed_at:%Y-%m-%d %H:%M})'
+
+    class Meta:
+        managed = False
+        db_table = 'catalog_goodcosthistory'
+        verbose_name_plural = 'история цен на товары'
+        verbose_name = 'изменение цены товара'
+
+
+class GoodCountQuerySet(models.QuerySet):
+
+    def set_count(self, good, good_place, count: float) -> None:
+        """Insert or update the count of the good at the place in one statement.
+
+        Goods and places can be given as instances or primary keys.
+        """
+        self.bulk_create(
+            [self.model(good_id=_pk(good), good_place_id=_pk(good_place), count=count)],
+            update_conflicts=True,
+            unique_fields=['good', 'good_place'],
+            update_fields=['count'],
+        )
 
 
 class GoodCount(models.Model):
     """Количество каждого наименования товара в каждом магазине."""
-    good_place = models.ForeignKey(GoodPlace, verbose_name='местонахождение', on_delete=models.PROTECT, null=True)
-    good = models.ForeignKey(Good, verbose_name='товар', on_delete=models.PROTECT, null=True)
+    # Indexed by the unique constraint and the index of the places.
+    good_place = models.ForeignKey(GoodPlace, verbose_name='местонахождение', on_delete=models.PROTECT,
+                                   db_index=False)
+    good = models.ForeignKey(Good, verbose_name='товар', on_delete=models.PROTECT, db_index=False)
     count = models.FloatField(default=0.0, verbose_name='количество')
 
+    objects = SelectRelatedManager.from_queryset(GoodCountQuerySet)('good', 'good_place',
+                                                                    defer=('good__search_vector',))
+
     def __str__(self):
-        return f'{self.good_place.name}\n{self.good.name}\nКоличество: {self.count}'
+        return f'{related_str(self, "good_place")}\n{related_str(self, "good")}\nКоличество: {self.count}'
 
     class Meta:
         verbose_name_plural = 'количество товаров'
         verbose_name = 'количество товара'
+        constraints = [
+            models.UniqueConstraint(fields=['good', 'good_place'], name='catalog_goodcount_good_place_uniq'),
+        ]
+        indexes = [
+            # Covers the listing of the stock at a place.
+            models.Index(fields=['good_place', 'good'], include=['count'], name='catalog_goodcount_place_good'),
+        ]
+
+
+class GoodAvailabilityQuerySet(models.QuerySet):
+
+    def refresh(self, good_ids=None) -> None:
+        """Recompute the summaries of the goods, of all goods if no ids are given.
+
+        The summaries are kept current by triggers, this is needed only to
+        rebuild them.
+        """
+        with connections[self._db or router.db_for_write(self.model)].cursor() as cursor:
+            if good_ids is None:
+                cursor.execute('SELECT catalog_refresh_good_availability(ARRAY(SELECT id FROM catalog_good))')
+            else:
+                cursor.execute('SELECT catalog_refresh_good_availability(%s::integer[])', [list(good_ids)])
+
+
+class GoodAvailability(models.Model):
+    """Сводка наличия и минимальной цены товара.
+
+    Строки пересчитываются триггерами catalog_goodcount и catalog_goodcost
+    и существуют только для товаров, у которых есть остатки или цены.
+    """
+    good = models.OneToOneField(Good, verbose_name='товар', on_delete=models.CASCADE, primary_key=True,
+                                related_name='availability')
+    total_count = models.FloatField(default=0.0, verbose_name='общее количество')
+    places_count = models.IntegerField(default=0, verbose_name='количество мест с товаром')
+    # The cheapest price is chosen by its value in the base currency (prices in
+    # currencies without a rate come last), min_cost is in its own currency.
+    min_cost = models.FloatField(null=True, verbose_name='минимальная цена')
+    min_cost_currency = models.ForeignKey(Currency, verbose_name='валюта минимальной цены',
+                                          on_delete=models.SET_NULL, null=True, related_name='+')
+    min_cost_base = models.FloatField(null=True, verbose_name='минимальная цена в базовой валюте')
+
+    objects = GoodAvailabilityQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{related_str(self, "good")}: {self.total_count}'
+
+    class Meta:
+        verbose_name_plural = 'наличие товаров'
+        verbose_name = 'наличие товара'
 
 
 class Employee(models.Model):
@@ -234,3 +504,41 @@ class Employee(models.Model):
     class Meta:
         verbose_name_plural = 'сотрудники магазинов'
         verbose_name = 'сотрудник магазина'
+
+
+class Task(models.Model):
+    """Фоновая задача, выполняемая процессами run_workers (см. catalog.queue)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'в очереди'),
+        (RUNNING, 'выполняется'),
+        (DONE, 'выполнена'),
+        (FAILED, 'не выполнена'),
+    )
+
+    name = models.CharField(max_length=100, verbose_name='задача')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='параметры')
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED, verbose_name='состояние')
+    # When a queued task is due or, while it is running, when its lease ends and
+    # another worker may take it over (the worker running it is considered dead).
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='время запуска')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='попыток')
+    max_attempts = models.PositiveSmallIntegerField(default=5, verbose_name='максимум попыток')
+    last_error = models.TextField(null=True, blank=True, verbose_name='последняя ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='создана')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='завершена')
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+    class Meta:
+        verbose_name_plural = 'фоновые задачи'
+        verbose_name = 'фоновая задача'
+        indexes = [
+            # Workers claim the due tasks from this index only, finished tasks are not in it.
+            models.Index(fields=['run_at'], name='catalog_task_due',
+                         condition=models.Q(status__in=('queued', 'running'))),
+        ]
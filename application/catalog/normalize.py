@@ -0,0 +1,56 @@
+"""Normalized forms of phone numbers and emails, stored next to the entered values."""
+import re
+from typing import Optional
+
+
+# Numbers written without the country code are Russian ones.
+DEFAULT_COUNTRY_CODE = '7'
+# Digits of the whole number (with the country code) for the codes of fixed length numbers.
+NUMBER_LENGTHS = {
+    '1': 11,
+    '7': 11,
+    '374': 11,
+    '375': 12,
+    '380': 12,
+    '992': 12,
+    '994': 12,
+    '995': 12,
+    '996': 12,
+    '998': 12,
+}
+_NON_DIGITS = re.compile(r'\D')
+# An extension: "доб. 123", "ext 12", "x12", "#12".
+_EXTENSION = re.compile(r'(доб|ext|x|#).*$', re.IGNORECASE)
+
+
+def normalize_phone(phone_number: str) -> Optional[str]:
+    """The number in E.164 (``+79161234567``), None if it is not a phone number.
+
+    Understands the Russian trunk prefix (``8 916 ...``) and numbers written
+    without the country code. An extension is dropped.
+    """
+    phone_number = _EXTENSION.sub('', (phone_number or '').strip())
+    digits = _NON_DIGITS.sub('', phone_number)
+    if phone_number.startswith('00'):
+        digits = digits[2:]
+    elif not phone_number.startswith('+'):
+        if len(digits) == 11 and digits.startswith('8'):
+            digits = DEFAULT_COUNTRY_CODE + digits[1:]
+        elif len(digits) == 10:
+            digits = DEFAULT_COUNTRY_CODE + digits
+    # E.164 allows at most 15 digits, country codes do not start with 0.
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return None
+    length = next((NUMBER_LENGTHS[digits[:size]] for size in (3, 2, 1) if digits[:size] in NUMBER_LENGTHS), None)
+    if length is not None and len(digits) != length:
+        return None
+    return f'+{digits}'
+
+
+def normalize_email(email: str) -> Optional[str]:
+    """The lower-cased address, None if it is not an email address."""
+    email = (email or '').strip().lower()
+    local, _, domain = email.rpartition('@')
+    if not local or not domain or ' ' in email:
+        return None
+    return email
@@ -0,0 +1,115 @@
+"""Keyset (seek) pagination of ``values()`` querysets and estimated counts of big tables."""
+import base64
+import datetime
+import json
+from typing import List, Optional, Sequence, Tuple
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _json_default(value):
+    # Full precision: the cursor must compare equal to the stored value.
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} cannot be a cursor value')
+
+
+def encode_cursor(values: Sequence) -> str:
+    data = json.dumps(list(values), separators=(',', ':'), ensure_ascii=False, default=_json_default).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise InvalidCursor('Malformed cursor.')
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor('Malformed cursor.')
+    return values
+
+
+def after(ordering: Sequence[str], values: Sequence) -> Q:
+    """Condition selecting rows which follow the given key in the ascending ordering.
+
+    ``a >= x AND (a > x OR b > y)`` rather than ``a > x OR (a = x AND b > y)``,
+    so the leading field bounds the scan of the (a, b) index.
+    """
+    field, value = ordering[0], values[0]
+    if len(ordering) == 1:
+        return Q(**{f'{field}__gt': value})
+    return Q(**{f'{field}__gte': value}) & (Q(**{f'{field}__gt': value}) | after(ordering[1:], values[1:]))
+
+
+async def akeyset_page(queryset: QuerySet, ordering: Sequence[str], cursor: Optional[str],
+                       limit: int) -> Tuple[List[dict], Optional[str]]:
+    """Page of ``values()`` rows following the cursor and the cursor of the next page.
+
+    The ordering must be unique (end with the primary key) and be covered by
+    an index, then every page costs one index range scan of ``limit`` rows.
+    """
+    if cursor:
+        # A value which the field cannot parse (e.g. a forged datetime) fails validation in filter().
+        try:
+            queryset = queryset.filter(after(ordering, decode_cursor(cursor, len(ordering))))
+        except (TypeError, ValueError, ValidationError):
+            raise InvalidCursor('Malformed cursor.')
+    # One extra row tells whether there is a next page.
+    rows = [row async for row in queryset.order_by(*ordering)[:limit + 1]]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][field] for field in ordering])
+    return rows, next_cursor
+
+
+def estimated_count(queryset: QuerySet) -> Optional[int]:
+    """Row count of the queryset as estimated by the planner, None if unknown.
+
+    Unfiltered querysets are counted from ``pg_class.reltuples`` (kept by
+    autovacuum and ANALYZE), the rest from the plan of the query.
+    """
+    query = queryset.query
+    with connections[queryset.db].cursor() as cursor:
+        if not query.where and not query.distinct:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                           [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            # -1: the table has never been analyzed.
+            return row[0] if row and row[0] >= 0 else None
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator which does not count big result sets exactly.
+
+    Up to ``exact_count_limit`` rows are counted exactly, by a count bounded
+    with LIMIT, so it never reads more rows than that. Bigger results are
+    counted with ``estimated_count``.
+    """
+    exact_count_limit = 10000
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) or queryset.query.is_sliced:
+            return super().count
+        count = queryset[:self.exact_count_limit + 1].count()
+        if count <= self.exact_count_limit:
+            return count
+        estimate = estimated_count(queryset)
+        # The estimate can be stale, it is known there are more rows than the limit.
+        return max(estimate or 0, count)
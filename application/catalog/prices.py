@@ -0,0 +1,83 @@
+"""Price history of goods kept in the monthly partitions of ``GoodCostHistory``."""
+import datetime
+from typing import List, Optional
+
+from django.db import connections, router
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import GoodCostHistory
+
+
+PARTITION_MONTHS_AHEAD = 3
+
+PRICES_AS_OF_SQL = '''
+    SELECT cur.id AS currency_id, h.cost, h.changed_at, cur.short_name AS currency
+    FROM catalog_currency cur
+    CROSS JOIN LATERAL (
+        SELECT cost, changed_at
+        FROM catalog_goodcosthistory
+        WHERE good_id = %s AND good_place_id = %s AND currency_id = cur.id AND changed_at <= %s
+        ORDER BY changed_at DESC, id DESC
+        LIMIT 1
+    ) h
+    ORDER BY cur.id
+'''
+
+
+def _add_months(day: datetime.date, months: int) -> datetime.date:
+    month = day.month - 1 + months
+    return datetime.date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def create_history_partitions(months_ahead: int = PARTITION_MONTHS_AHEAD,
+                              since: Optional[datetime.date] = None) -> List[str]:
+    """Create the missing partitions up to ``months_ahead`` months after the current one.
+
+    The partitions are created from the month of ``since`` (the current month
+    by default). The rows of those months are moved out of the default
+    partition. Returns the names of the created partitions.
+    """
+    current = timezone.now().astimezone(datetime.timezone.utc).date().replace(day=1)
+    month = (since or current).replace(day=1)
+    last = _add_months(current, months_ahead)
+    created = []
+    with connections[router.db_for_write(GoodCostHistory)].cursor() as cursor:
+        while month <= last:
+            cursor.execute('SELECT catalog_goodcosthistory_create_partition(%s)', [month])
+            name = cursor.fetchone()[0]
+            if name:
+                created.append(name)
+            month = _add_months(month, 1)
+    return created
+
+
+def prices_as_of(good_id: int, good_place_id: int, moment: datetime.datetime) -> List[dict]:
+    """Prices of the good at the place at the moment, one per currency.
+
+    The latest change in every currency is looked up with ``LIMIT 1`` through
+    the (good, place, currency, changed_at) index, probing every partition
+    up to the moment once per currency instead of reading the whole history.
+    """
+    with connections[router.db_for_read(GoodCostHistory)].cursor() as cursor:
+        cursor.execute(PRICES_AS_OF_SQL, [good_id, good_place_id, moment])
+        columns = [column.name for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    # A NULL cost: the price had been removed by then.
+    return [row for row in rows if row['cost'] is not None]
+
+
+def price_series(good_id: int, good_place_id: Optional[int] = None, start: Optional[datetime.datetime] = None,
+                 end: Optional[datetime.datetime] = None) -> QuerySet:
+    """Changes of the prices of the good (at the place), as ``values()`` to be ordered by (changed_at, id).
+
+    Time bounds prune the partitions outside of them.
+    """
+    queryset = GoodCostHistory.objects.filter(good_id=good_id)
+    if good_place_id is not None:
+        queryset = queryset.filter(good_place_id=good_place_id)
+    if start is not None:
+        queryset = queryset.filter(changed_at__gte=start)
+    if end is not None:
+        queryset = queryset.filter(changed_at__lte=end)
+    return queryset.values('id', 'changed_at', 'good_place_id', 'currency_id', 'cost')
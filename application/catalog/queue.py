@@ -0,0 +1,165 @@
+"""Background tasks kept in the ``catalog_task`` table and run by ``manage.py run_workers``.
+
+Workers claim due tasks with ``SELECT ... FOR UPDATE SKIP LOCKED``, so any
+number of them share the table without waiting on each other's locks and no
+broker is needed. A claimed task is leased to its worker for the ``lease``
+of its registration, the task of a worker which died is claimed again when
+the lease ends. A failing task is retried with an exponential backoff until
+it runs out of attempts.
+
+Tasks are registered with the ``task`` decorator and queued with
+``enqueue()`` in the transaction of the caller: a task queued by a
+transaction which is rolled back never runs.
+"""
+import datetime
+import json
+import logging
+import random
+import time
+import traceback
+from contextvars import Context
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from django.db import DatabaseError, close_old_connections, router
+from django.utils import timezone
+
+from .models import Task
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE = 600
+DEFAULT_MAX_ATTEMPTS = 5
+# Retries wait 10 s, 20 s, 40 s, ... up to an hour, less up to a half for the jitter.
+BACKOFF_BASE = 10
+BACKOFF_MAX = 3600
+POLL_INTERVAL = 1.0
+
+# The lease of the claimed task is looked up by its name in the leases passed as JSON.
+CLAIM_SQL = '''
+    UPDATE catalog_task
+    SET status = 'running', attempts = attempts + 1,
+        run_at = now() + coalesce((%s::jsonb ->> name)::integer, %s) * interval '1 second'
+    WHERE id = (
+        SELECT id FROM catalog_task
+        WHERE status IN ('queued', 'running') AND run_at <= now()
+        ORDER BY run_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING *
+'''
+
+
+@dataclass
+class RegisteredTask:
+    name: str
+    function: Callable
+    lease: int
+    max_attempts: int
+
+
+TASKS: Dict[str, RegisteredTask] = {}
+
+
+class UnknownTask(ValueError):
+    pass
+
+
+def task(name: str, lease: int = DEFAULT_LEASE, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+    """Register the function as the task ``name``, run with the payload as keyword arguments.
+
+    ``lease``: seconds the task may run before another worker takes it over.
+    """
+    def register(function):
+        if name in TASKS:
+            raise ValueError(f'Task {name} is already registered.')
+        TASKS[name] = RegisteredTask(name, function, lease, max_attempts)
+        return function
+    return register
+
+
+def enqueue(name: str, payload: Optional[dict] = None, run_at: Optional[datetime.datetime] = None) -> Task:
+    """Queue the task to run at ``run_at`` (at once by default). The payload must be JSON serializable."""
+    registered = TASKS.get(name)
+    if registered is None:
+        raise UnknownTask(f'Unknown task {name}.')
+    return Task.objects.create(name=name, payload=payload or {}, run_at=run_at or timezone.now(),
+                               max_attempts=registered.max_attempts)
+
+
+def claim() -> Optional[Task]:
+    """Lease the task which is due the longest, None if no task is due."""
+    leases = json.dumps({name: registered.lease for name, registered in TASKS.items()})
+    tasks = Task.objects.db_manager(router.db_for_write(Task)).raw(CLAIM_SQL, [leases, DEFAULT_LEASE])
+    return next(iter(tasks), None)
+
+
+def backoff(attempts: int) -> float:
+    """Seconds before the retry after the given number of attempts."""
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX) * random.uniform(0.5, 1)
+
+
+def _finish(task: Task, **fields) -> None:
+    # Unless the lease has ended and another worker has claimed the task again.
+    Task.objects.filter(pk=task.pk, attempts=task.attempts).update(**fields)
+
+
+def run(task: Task) -> None:
+    """Run the claimed task and record its outcome."""
+    registered = TASKS.get(task.name)
+    if registered is None:
+        _finish(task, status=Task.FAILED, last_error=f'Unknown task {task.name}.', finished_at=timezone.now())
+        return
+    if task.attempts > task.max_attempts:
+        # The last attempt was claimed by a worker which died.
+        _finish(task, status=Task.FAILED, finished_at=timezone.now())
+        return
+
+    started = time.monotonic()
+    try:
+        # In a context of its own, so the task routes its reads the way a
+        # request does (see application.routers), unpinned by the claim.
+        Context().run(registered.function, **task.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if task.attempts >= task.max_attempts:
+            logger.exception('Task %s failed after %s attempts.', task, task.attempts)
+            _finish(task, status=Task.FAILED, last_error=error, finished_at=timezone.now())
+        else:
+            delay = backoff(task.attempts)
+            logger.warning('Task %s failed, retrying in %.0f s.', task, delay, exc_info=True)
+            _finish(task, status=Task.QUEUED, last_error=error,
+                    run_at=timezone.now() + datetime.timedelta(seconds=delay))
+    else:
+        logger.info('Task %s done in %.3f s.', task, time.monotonic() - started)
+        _finish(task, status=Task.DONE, finished_at=timezone.now())
+
+
+def run_next() -> bool:
+    """Claim and run one due task. Returns False if no task was due."""
+    try:
+        task = claim()
+        if task is None:
+            return False
+        run(task)
+        return True
+    finally:
+        # Returns the connections to the pool, as at the end of a request.
+        close_old_connections()
+
+
+def work(stop, burst: bool = False) -> None:
+    """Run due tasks until the ``stop`` event is set or, with ``burst``, until none is due."""
+    while not stop.is_set():
+        try:
+            ran = run_next()
+        except DatabaseError:
+            # The database is unreachable, the task (if claimed) is retried when its lease ends.
+            logger.exception('Cannot run a task.')
+            ran = False
+        if not ran:
+            if burst:
+                break
+            stop.wait(POLL_INTERVAL)
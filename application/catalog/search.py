@@ -0,0 +1,31 @@
+"""Full-text search of goods over the stored ``Good.search_vector``."""
+from typing import Optional
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, QuerySet
+
+from .models import Good
+
+
+# Text search configurations the search vector is built with
+# (see the catalog_good_search_vector trigger).
+SEARCH_CONFIGS = ('russian', 'simple')
+
+
+def search_query(text: str) -> SearchQuery:
+    """Query matching the text in any of the search configurations."""
+    query = None
+    for config in SEARCH_CONFIGS:
+        config_query = SearchQuery(text, config=config, search_type='websearch')
+        query = config_query if query is None else query | config_query
+    return query
+
+
+def search_goods(text: str, queryset: Optional[QuerySet] = None) -> QuerySet:
+    """Goods matching the text, annotated with ``search_rank`` and ordered by it."""
+    if queryset is None:
+        queryset = Good.objects.all()
+    query = search_query(text)
+    return queryset.filter(search_vector=query) \
+                   .annotate(search_rank=SearchRank(F('search_vector'), query)) \
+                   .order_by('-search_rank', 'id')
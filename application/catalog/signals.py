@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import cache
+from .models import GoodSubjectArea, GoodCategory, GoodType, Good
+from .tree import category_tree
+
+
+@receiver(post_save, sender=GoodSubjectArea)
+@receiver(post_delete, sender=GoodSubjectArea)
+@receiver(post_save, sender=GoodCategory)
+@receiver(post_delete, sender=GoodCategory)
+@receiver(post_save, sender=GoodType)
+@receiver(post_delete, sender=GoodType)
+def invalidate_category_tree(sender, **kwargs):
+    # Other processes must not rebuild the tree before the change is visible to them.
+    transaction.on_commit(category_tree.invalidate)
+
+
+@receiver(post_save, sender=Good)
+@receiver(post_delete, sender=Good)
+def invalidate_goods(sender, **kwargs):
+    transaction.on_commit(lambda: cache.bump_version(cache.GOODS))
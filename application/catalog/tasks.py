@@ -0,0 +1,61 @@
+"""Heavy catalog jobs run by the background workers, see catalog.queue."""
+import datetime
+from typing import List, Optional
+
+from django.core.management import call_command
+from django.db import connections, router
+from django.utils import timezone
+
+from .models import Good, GoodAvailability, Task
+from .prices import PARTITION_MONTHS_AHEAD, create_history_partitions
+from .queue import task
+
+
+SEARCH_VECTOR_BATCH_SIZE = 10000
+FINISHED_TASKS_KEEP_DAYS = 7
+
+
+@task('catalog.refresh_availability', lease=3600)
+def refresh_availability(good_ids: Optional[List[int]] = None) -> None:
+    """Recompute the availability summaries of the goods, of all goods if no ids are given."""
+    GoodAvailability.objects.refresh(good_ids)
+
+
+@task('catalog.rebuild_search_vectors', lease=3600)
+def rebuild_search_vectors(batch_size: int = SEARCH_VECTOR_BATCH_SIZE) -> None:
+    """Recompute ``Good.search_vector`` by ranges of ids, one short transaction per range."""
+    with connections[router.db_for_write(Good)].cursor() as cursor:
+        cursor.execute('SELECT min(id), max(id) FROM catalog_good')
+        first, last = cursor.fetchone()
+        if first is None:
+            return
+        for start in range(first, last + 1, batch_size):
+            # The catalog_good_search_vector trigger fills the emptied vectors.
+            cursor.execute('UPDATE catalog_good SET search_vector = NULL WHERE id >= %s AND id < %s',
+                           [start, start + batch_size])
+
+
+# A feed with bad rows fails the same way every time.
+@task('catalog.import_catalog', lease=3600, max_attempts=1)
+def import_catalog(kind: str, path: str, format: Optional[str] = None) -> None:
+    """Import a feed file, see the import_catalog command."""
+    call_command('import_catalog', kind, path, format=format)
+
+
+@task('catalog.export_prices', lease=3600)
+def export_prices(output: str, format: str = 'csv') -> None:
+    """Export the price list to a file, see the export_prices command."""
+    call_command('export_prices', output=output, format=format)
+
+
+@task('catalog.create_price_history_partitions')
+def create_price_history_partitions(months_ahead: int = PARTITION_MONTHS_AHEAD) -> None:
+    """Create the missing monthly partitions of the price history, see the price_history_partitions command."""
+    create_history_partitions(months_ahead)
+
+
+@task('catalog.purge_finished_tasks')
+def purge_finished_tasks(days: int = FINISHED_TASKS_KEEP_DAYS) -> None:
+    """Delete the tasks finished more than ``days`` days ago."""
+    Task.objects.filter(status__in=(Task.DONE, Task.FAILED),
+                        finished_at__lt=timezone.now() - datetime.timedelta(days=days)).delete()
@@ -1,3 +1,284 @@
-from django.test import TestCase
+import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache as shared_cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from application.routers import WROTE, ReplicaRouter, _pin_on_write, _pinned
+
+from .facets import InvalidFilter, _group_facets, _where
+from .models import Email, Good, PhoneNumber
+from .normalize import normalize_email, normalize_phone
+from .pagination import InvalidCursor, after, akeyset_page, decode_cursor, encode_cursor
+from .prices import price_series
+from .tree import CategoryNode, CategoryTree, SubjectAreaNode
+
+
+class NormalizePhoneTests(SimpleTestCase):
+
+    def test_russian_formats(self):
+        for phone_number in ('+7 (916) 123-45-67', '8 916 123 45 67', '9161234567', '007 916 123 45 67'):
+            with self.subTest(phone_number=phone_number):
+                self.assertEqual(normalize_phone(phone_number), '+79161234567')
+
+    def test_extension_is_dropped(self):
+        for phone_number in ('89161234567 доб. 123', '+7 916 123-45-67 ext 5', '+79161234567x12',
+                             '8 (916) 123-45-67 #4', '8 916 123 45 67 ДОБ 1'):
+            with self.subTest(phone_number=phone_number):
+                self.assertEqual(normalize_phone(phone_number), '+79161234567')
+
+    def test_length_of_country_code(self):
+        self.assertEqual(normalize_phone('+375 29 123-45-67'), '+375291234567')
+        self.assertIsNone(normalize_phone('+7 916 123-45-678'))
+        self.assertIsNone(normalize_phone('+375 29 123-45-6'))
+        self.assertIsNone(normalize_phone('+1 212 555 012'))
+
+    def test_other_countries(self):
+        self.assertEqual(normalize_phone('+49 30 123456'), '+4930123456')
+        self.assertEqual(normalize_phone('0044 20 7946 0958'), '+442079460958')
+
+    def test_not_a_phone_number(self):
+        for phone_number in ('', None, '123', '+0 123 456 789', '+1234567890123456'):
+            with self.subTest(phone_number=phone_number):
+                self.assertIsNone(normalize_phone(phone_number))
+
+
+class NormalizeEmailTests(SimpleTestCase):
+
+    def test_lower_cased(self):
+        self.assertEqual(normalize_email(' User1@Example.COM '), 'user1@example.com')
+
+    def test_not_an_email(self):
+        for email in ('', None, 'user', '@example.com', 'user@', 'us er@example.com'):
+            with self.subTest(email=email):
+                self.assertIsNone(normalize_email(email))
+
+
+class NormalizedUniquenessTests(TestCase):
+
+    def test_duplicate_phone_number(self):
+        PhoneNumber.objects.create(phone_number='+7 916 123-45-67')
+        duplicate = PhoneNumber(phone_number='8 (916) 1234567 доб. 2')
+        with self.assertRaises(ValidationError) as raised:
+            duplicate.clean()
+        self.assertIn('phone_number', raised.exception.message_dict)
+
+    def test_same_phone_number_saved_again(self):
+        phone_number = PhoneNumber.objects.create(phone_number='+7 916 123-45-67')
+        phone_number.phone_number = '8 916 123 45 67'
+        phone_number.clean()
+        self.assertEqual(phone_number.phone_e164, '+79161234567')
+
+    def test_invalid_phone_number(self):
+        with self.assertRaises(ValidationError):
+            PhoneNumber(phone_number='12-34').clean()
+
+    def test_duplicate_email(self):
+        Email.objects.create(email='user@example.com')
+        with self.assertRaises(ValidationError) as raised:
+            Email(email='User@Example.com').clean()
+        self.assertIn('email', raised.exception.message_dict)
+
+
+class CursorTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        cursor = encode_cursor(['Молоток', 42])
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decode_cursor(cursor, 2), ['Молоток', 42])
+
+    def test_datetime_keeps_full_precision(self):
+        moment = datetime.datetime(2026, 10, 18, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc)
+        self.assertEqual(decode_cursor(encode_cursor([moment, 7]), 2), ['2026-10-18T12:30:15.123456+00:00', 7])
+
+    def test_malformed(self):
+        for cursor, size in (('not a cursor', 1), (encode_cursor([1, 2]), 1), (encode_cursor([1]), 2)):
+            with self.subTest(cursor=cursor, size=size):
+                with self.assertRaises(InvalidCursor):
+                    decode_cursor(cursor, size)
+
+    async def test_malformed_datetime(self):
+        # Rejected when the filter is built, before any query.
+        with self.assertRaises(InvalidCursor):
+            await akeyset_page(price_series(1), ('changed_at', 'id'), encode_cursor(['garbage', 1]), 10)
+
+    def test_not_serializable(self):
+        with self.assertRaises(TypeError):
+            encode_cursor([object()])
+
+    def test_after_single_field(self):
+        self.assertEqual(after(['id'], [5]), Q(id__gt=5))
+
+    def test_after_bounds_leading_field(self):
+        self.assertEqual(after(['name', 'id'], ['a', 5]), Q(name__gte='a') & (Q(name__gt='a') | Q(id__gt=5)))
+        self.assertEqual(
+            after(['changed_at', 'good_place_id', 'id'], ['t', 2, 3]),
+            Q(changed_at__gte='t') & (Q(changed_at__gt='t') |
+                                      (Q(good_place_id__gte=2) & (Q(good_place_id__gt=2) | Q(id__gt=3)))),
+        )
+
+
+# Subject area 1 with category 10 and category 20 without a subject area.
+TREE = CategoryTree(
+    subject_areas=[SubjectAreaNode(1, 'Инструменты', [CategoryNode(10, 'Молотки', 1)])],
+    orphan_categories=[CategoryNode(20, 'Разное', None)],
+)
+
+
+@mock.patch('catalog.facets.get_category_tree', return_value=TREE)
+class FacetFilterTests(SimpleTestCase):
+
+    def test_no_filters(self, get_category_tree):
+        self.assertEqual(_where({}), ('true', []))
+
+    def test_conditions_and_params_in_order(self, get_category_tree):
+        where, params = _where({'type': 3, 'unit': 4, 'price_min': 100.0, 'price_max': 500.0})
+        self.assertEqual(where, 'true AND g.type_id = %s AND g.unit_id = %s '
+                                'AND a.min_cost_base >= %s AND a.min_cost_base <= %s')
+        self.assertEqual(params, [3, 4, 100.0, 500.0])
+
+    def test_subtree_filters_are_path_prefixes(self, get_category_tree):
+        self.assertEqual(_where({'subject_area': 1}), ('true AND g.category_path LIKE %s', ['/1/%']))
+        self.assertEqual(_where({'category': 10}), ('true AND g.category_path LIKE %s', ['/1/10/%']))
+        self.assertEqual(_where({'category': 20}), ('true AND g.category_path LIKE %s', ['//20/%']))
+
+    def test_unknown_subtree_matches_nothing(self, get_category_tree):
+        self.assertEqual(_where({'subject_area': 2}), ('true AND false', []))
+        self.assertEqual(_where({'category': 11, 'type': 3}), ('true AND false AND g.type_id = %s', [3]))
+
+    def test_in_stock(self, get_category_tree):
+        self.assertEqual(_where({'in_stock': True}), ('true AND a.total_count > 0', []))
+        self.assertEqual(_where({'in_stock': False}), ('true AND coalesce(a.total_count, 0) = 0', []))
+
+    def test_unknown_filter(self, get_category_tree):
+        with self.assertRaises(InvalidFilter):
+            _where({'color': 'red'})
+
+
+# The static files are not collected for the tests.
+@override_settings(STORAGES={'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}})
+@mock.patch('catalog.views.get_category_tree', return_value=TREE)
+class IndexTests(SimpleTestCase):
+
+    def setUp(self):
+        shared_cache.clear()
+
+    async def test_render(self, get_category_tree):
+        response = await self.async_client.get(reverse('catalog:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<p class="category-name">Молотки</p>', html=True)
+        self.assertContains(response, '<p class="category-name">Разное</p>', html=True)
+
+    async def test_categories_are_cached(self, get_category_tree):
+        await self.async_client.get(reverse('catalog:index'))
+        response = await self.async_client.get(reverse('catalog:index'))
+        self.assertContains(response, '<p class="category-name">Молотки</p>', html=True)
+        get_category_tree.assert_called_once()
+
+    async def test_not_modified(self, get_category_tree):
+        response = await self.async_client.get(reverse('catalog:index'))
+        response = await self.async_client.get(reverse('catalog:index'), headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+
+class GroupFacetsTests(SimpleTestCase):
+    # GROUPING(subject_area_id, category_id, type_id, unit_id, in_stock, price_bucket)
+    # sets the bit of every column not grouped by, the first column is the highest bit.
+    SUBJECT_AREA = 0b011111
+    CATEGORY = 0b101111
+    TYPE = 0b110111
+    UNIT = 0b111011
+    IN_STOCK = 0b111101
+    PRICE = 0b111110
+    TOTAL = 0b111111
+
+    def test_empty(self):
+        facets = _group_facets(None)
+        self.assertEqual(facets['total'], 0)
+        self.assertEqual(facets['subject_area'], [])
+        self.assertEqual(facets['price'], [])
+
+    def test_grouping_sets(self):
+        rows = [
+            {'grouping': self.TOTAL, 'count': 7},
+            {'grouping': self.SUBJECT_AREA, 'subject_area_id': 2, 'subject_area_name': 'Сад', 'count': 2},
+            {'grouping': self.SUBJECT_AREA, 'subject_area_id': 1, 'subject_area_name': 'Инструменты', 'count': 5},
+            # Goods of types without a category.
+            {'grouping': self.SUBJECT_AREA, 'subject_area_id': None, 'subject_area_name': None, 'count': 1},
+            {'grouping': self.CATEGORY, 'category_id': 10, 'category_name': 'Молотки', 'count': 5},
+            {'grouping': self.TYPE, 'type_id': 4, 'type_name': 'Б', 'count': 3},
+            {'grouping': self.TYPE, 'type_id': 3, 'type_name': 'А', 'count': 3},
+            {'grouping': self.UNIT, 'unit_id': 1, 'unit_name': 'шт', 'count': 7},
+            {'grouping': self.IN_STOCK, 'in_stock': True, 'count': 6},
+            {'grouping': self.IN_STOCK, 'in_stock': False, 'count': 1},
+            {'grouping': self.PRICE, 'price_bucket': 0, 'count': 2},
+            {'grouping': self.PRICE, 'price_bucket': 5, 'count': 1},
+            {'grouping': self.PRICE, 'price_bucket': 2, 'count': 4},
+        ]
+        facets = _group_facets(rows)
+        self.assertEqual(facets['total'], 7)
+        self.assertEqual(facets['subject_area'], [
+            {'id': 1, 'name': 'Инструменты', 'count': 5},
+            {'id': 2, 'name': 'Сад', 'count': 2},
+        ])
+        self.assertEqual(facets['category'], [{'id': 10, 'name': 'Молотки', 'count': 5}])
+        # Equal counts are ordered by the name.
+        self.assertEqual(facets['type'], [{'id': 3, 'name': 'А', 'count': 3}, {'id': 4, 'name': 'Б', 'count': 3}])
+        self.assertEqual(facets['unit'], [{'id': 1, 'name': 'шт', 'count': 7}])
+        self.assertEqual(facets['in_stock'], [{'value': True, 'count': 6}, {'value': False, 'count': 1}])
+        self.assertEqual(facets['price'], [
+            {'min': None, 'max': 100, 'count': 2},
+            {'min': 10000, 'max': None, 'count': 1},
+            {'min': 500, 'max': 1000, 'count': 4},
+        ])
+
+
+class ReplicaPinTests(SimpleTestCase):
+
+    def setUp(self):
+        token = _pinned.set(None)
+        self.addCleanup(_pinned.reset, token)
+
+    def execute(self, sql):
+        return _pin_on_write(lambda *args: None, sql, [], False, {})
+
+    def test_routing_a_write_does_not_pin(self):
+        ReplicaRouter().db_for_write(Good)
+        self.assertIsNone(_pinned.get())
+
+    def test_reads_do_not_pin(self):
+        self.execute('SELECT "catalog_good"."id" FROM "catalog_good" FOR UPDATE')
+        self.assertIsNone(_pinned.get())
+
+    def test_writes_pin(self):
+        for sql in ('INSERT INTO "catalog_good" ("code") VALUES (%s)', ' update catalog_task SET status = %s',
+                    'DELETE FROM "catalog_good" WHERE "catalog_good"."id" IN (%s)'):
+            with self.subTest(sql=sql):
+                _pinned.set(None)
+                self.execute(sql)
+                self.assertEqual(_pinned.get(), WROTE)
+
+
+class GoodAdminSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        Good.objects.create(code='M-1', name='Молоко пастеризованное', description='Молоко 3,2 %')
+        Good.objects.create(code='M-2', name='Молоток слесарный')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_search_changelist(self):
+        response = self.client.get(reverse('admin:catalog_good_changelist'), {'q': 'молоко'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([good.code for good in response.context['cl'].result_list], ['M-1'])
+
+    def test_search_sorted_by_column(self):
+        response = self.client.get(reverse('admin:catalog_good_changelist'), {'q': 'молоко', 'o': '2'})
+        self.assertEqual(response.status_code, 200)
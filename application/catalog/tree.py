@@ -0,0 +1,84 @@
+"""Subject area -> category -> type tree of the catalog."""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from . import cache
+from .models import GoodSubjectArea, GoodCategory, GoodType
+
+
+@dataclass
+class TypeNode:
+    id: int
+    name: str
+
+
+@dataclass
+class CategoryNode:
+    id: int
+    name: str
+    subject_area_id: Optional[int]
+    types: List[TypeNode] = field(default_factory=list)
+
+
+@dataclass
+class SubjectAreaNode:
+    id: int
+    name: str
+    categories: List[CategoryNode] = field(default_factory=list)
+
+
+@dataclass
+class CategoryTree:
+    subject_areas: List[SubjectAreaNode]
+    # Categories without a subject area.
+    orphan_categories: List[CategoryNode]
+
+    @property
+    def categories(self) -> List[CategoryNode]:
+        categories = [category for area in self.subject_areas for category in area.categories]
+        return categories + self.orphan_categories
+
+    def subject_area_path(self, subject_area_id: int) -> Optional[str]:
+        """Prefix of ``Good.category_path`` of the goods in the subject area, None if there is no such area."""
+        if any(area.id == subject_area_id for area in self.subject_areas):
+            return f'/{subject_area_id}/'
+        return None
+
+    def category_path(self, category_id: int) -> Optional[str]:
+        """Prefix of ``Good.category_path`` of the goods in the category, None if there is no such category."""
+        for category in self.categories:
+            if category.id == category_id:
+                return f'/{category.subject_area_id or ""}/{category_id}/'
+        return None
+
+
+def build_category_tree() -> CategoryTree:
+    """Build the tree with one query per level."""
+    areas: Dict[int, SubjectAreaNode] = {
+        row['id']: SubjectAreaNode(row['id'], row['name'])
+        for row in GoodSubjectArea.objects.order_by('name', 'id').values('id', 'name')
+    }
+
+    categories: Dict[int, CategoryNode] = {}
+    orphan_categories = []
+    for row in GoodCategory.objects.order_by('name', 'id').values('id', 'name', 'subject_area_id'):
+        category = categories[row['id']] = CategoryNode(row['id'], row['name'], row['subject_area_id'])
+        area = areas.get(row['subject_area_id'])
+        if area is None:
+            orphan_categories.append(category)
+        else:
+            area.categories.append(category)
+
+    for row in GoodType.objects.order_by('name', 'id').values('id', 'name', 'category_id'):
+        category = categories.get(row['category_id'])
+        if category is not None:
+            category.types.append(TypeNode(row['id'], row['name']))
+
+    return CategoryTree(list(areas.values()), orphan_categories)
+
+
+category_tree = cache.VersionedCache(cache.TREE, build_category_tree)
+
+
+def get_category_tree() -> CategoryTree:
+    return category_tree.get()
@@ -7,4 +7,14 @@ app_name = 'catalog'
 
 urlpatterns = [
     path('', views.index, name='index'),
-]
\ No newline at end of file
+    path('search/', views.search, name='search'),
+    path('goods/autocomplete/', views.autocomplete, name='autocomplete'),
+    path('api/goods/', views.goods, name='goods'),
+    path('api/goods/facets/', views.goods_facets, name='goods_facets'),
+    path('api/goods/<int:good_id>/', views.good_detail, name='good_detail'),
+    path('api/goods/<int:good_id>/prices/', views.good_prices_as_of, name='good_prices_as_of'),
+    path('api/goods/<int:good_id>/prices/history/', views.good_price_history, name='good_price_history'),
+    path('api/goods/<int:good_id>/nearest/', views.nearest_places, name='nearest_places'),
+    path('api/contacts/lookup/', views.contact_lookup, name='contact_lookup'),
+    path('prices/export/', views.export_prices, name='export_prices'),
+]
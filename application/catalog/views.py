@@ -1,15 +1,302 @@
-from django.http import HttpRequest, HttpResponse
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache as shared_cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import F
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.safestring import mark_safe
+
+from application.staticfiles import build_id
+
+from . import cache
+from .contacts import find_contact
+from .export import EXPORT_FORMATS, aexport_price_list, export_price_list
+from .facets import InvalidFilter, faceted_goods
+from .geo import nearest_places_with_stock
+from .lookup import lookup_goods
+from .models import Good, GoodCost, GoodCount
+from .pagination import InvalidCursor, akeyset_page
+from .prices import price_series, prices_as_of
+from .search import search_goods
+from .tree import get_category_tree
+
+
+SEARCH_RESULTS_LIMIT = 50
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+GOODS_PAGE_SIZE = 50
+GOODS_MAX_PAGE_SIZE = 200
+PRICE_HISTORY_PAGE_SIZE = 200
+PRICE_HISTORY_MAX_PAGE_SIZE = 1000
+NEAREST_PLACES_LIMIT = 5
+NEAREST_PLACES_MAX_LIMIT = 50
+NEAREST_RADIUS_KM = 50
+NEAREST_MAX_RADIUS_KM = 500
+# The rendered list of categories of the index page, under the version of the tree and the build.
+INDEX_CATEGORIES_KEY = 'catalog:index_categories:{}:{}'
+INDEX_CATEGORIES_TIMEOUT = 24 * 60 * 60
+
+# Orderings of the goods API, each one is covered by an index of Good.
+GOODS_ORDERINGS = {
+    'name': ('name', 'id'),
+    'id': ('id',),
+}
+FACET_ID_FILTERS = ('subject_area', 'category', 'type', 'unit')
+GOODS_FILTERS = ('type', 'category', 'subject_area')
+
 
-from .models import GoodCategory
+def _limit(request: HttpRequest, default: int, maximum: int) -> int:
+    try:
+        limit = min(int(request.GET.get('limit', default)), maximum)
+    except ValueError:
+        limit = default
+    return max(limit, 1)
 
 
-def index(request: HttpRequest) -> HttpResponse:
+def _moment(value: str) -> datetime.datetime:
+    """Aware datetime of an ISO date or datetime. A date means the end of the day (UTC)."""
+    try:
+        day = parse_date(value)
+        if day is not None:
+            moment = datetime.datetime.combine(day, datetime.time.max)
+        else:
+            moment = parse_datetime(value)
+            if moment is None:
+                raise ValueError
+    except ValueError:
+        raise ValueError(f'{value!r} is not an ISO date or datetime')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, datetime.timezone.utc)
+    return moment
+
+
+async def index(request: HttpRequest) -> HttpResponse:
     """View для отображения главной страницы каталога товаров."""
 
-    categories = GoodCategory.objects.all()
+    # The page depends only on the category tree and the deployed build, so
+    # the version stamp of the tree (the time of its last change) and the
+    # build identify the page.
+    version = await sync_to_async(cache.get_version)(cache.TREE)
+    build = build_id()
+    etag = f'"catalog-{version}-{build}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return response
+
+    # Through the async cache API, a synchronous lookup would block the event loop.
+    key = INDEX_CATEGORIES_KEY.format(version, build)
+    categories = await shared_cache.aget(key)
+    if categories is None:
+        tree = await sync_to_async(get_category_tree)()
+        categories = render_to_string('catalog/categories.html', {'categories': tree.categories})
+        await shared_cache.aset(key, categories, INDEX_CATEGORIES_TIMEOUT)
+
+    context = {'categories': mark_safe(categories)}
+    response = render(request, 'catalog/index.html', context)
+    response['ETag'] = etag
+    # Revalidate on every request, it is answered with 304 while nothing changes.
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+async def search(request: HttpRequest) -> HttpResponse:
+    """View для полнотекстового поиска товаров по наименованию, коду и описанию."""
+
+    query = request.GET.get('q', '').strip()
+    goods = []
+    if query:
+        goods = [good async for good in search_goods(query).values('id', 'name', 'code')[:SEARCH_RESULTS_LIMIT]]
 
     context = {
-        'categories': categories
+        'query': query,
+        'goods': goods,
     }
-    return render(request, 'catalog/index.html', context)
+    return render(request, 'catalog/search.html', context)
+
+
+def autocomplete(request: HttpRequest) -> JsonResponse:
+    """View для подбора товаров по части или опечатке в коде и наименовании."""
+
+    limit = _limit(request, AUTOCOMPLETE_LIMIT, AUTOCOMPLETE_MAX_LIMIT)
+    return JsonResponse({'results': lookup_goods(request.GET.get('q', ''), limit)})
+
+
+async def goods(request: HttpRequest) -> JsonResponse:
+    """View для постраничного (keyset) получения списка товаров в JSON."""
+
+    ordering = GOODS_ORDERINGS.get(request.GET.get('sort', 'name'))
+    if ordering is None:
+        return JsonResponse({'error': f'sort must be one of: {", ".join(GOODS_ORDERINGS)}'}, status=400)
+
+    queryset = Good.objects.values(
+        'id', 'code', 'name', 'type_id',
+        unit=F('unit__short_name'),
+        # The summary is joined by the primary key.
+        total_count=F('availability__total_count'),
+        places_count=F('availability__places_count'),
+        min_cost=F('availability__min_cost'),
+        min_cost_currency=F('availability__min_cost_currency__short_name'),
+    )
+    filters = {}
+    for param in GOODS_FILTERS:
+        value = request.GET.get(param)
+        if value is None:
+            continue
+        if not value.isdigit():
+            return JsonResponse({'error': f'{param} must be an id'}, status=400)
+        filters[param] = int(value)
+    if 'type' in filters:
+        queryset = queryset.filter(type_id=filters['type'])
+    if 'category' in filters or 'subject_area' in filters:
+        # A subtree is a range of the indexed path instead of joins up the hierarchy.
+        tree = await sync_to_async(get_category_tree)()
+        for param, path in (('category', tree.category_path), ('subject_area', tree.subject_area_path)):
+            if param in filters:
+                prefix = path(filters[param])
+                queryset = queryset.filter(category_path__startswith=prefix) if prefix else queryset.none()
+
+    limit = _limit(request, GOODS_PAGE_SIZE, GOODS_MAX_PAGE_SIZE)
+    try:
+        rows, next_cursor = await akeyset_page(queryset, ordering, request.GET.get('cursor'), limit)
+    except InvalidCursor as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    return JsonResponse({'results': rows, 'next': next_cursor})
+
+
+async def goods_facets(request: HttpRequest) -> JsonResponse:
+    """View для фильтрации товаров по фасетам с количеством товаров по каждому значению в JSON."""
+
+    filters = {}
+    try:
+        for param in FACET_ID_FILTERS:
+            if param in request.GET:
+                filters[param] = int(request.GET[param])
+        for param in ('price_min', 'price_max'):
+            if param in request.GET:
+                filters[param] = float(request.GET[param])
+    except ValueError:
+        return JsonResponse({'error': f'{", ".join(FACET_ID_FILTERS)} must be ids, price_min and price_max numbers'},
+                            status=400)
+    if 'in_stock' in request.GET:
+        filters['in_stock'] = request.GET['in_stock'].lower() in ('1', 'true', 'yes')
+
+    limit = _limit(request, GOODS_PAGE_SIZE, GOODS_MAX_PAGE_SIZE)
+    try:
+        page = await sync_to_async(faceted_goods)(filters, request.GET.get('cursor'), limit)
+    except (InvalidCursor, InvalidFilter) as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse(page)
+
+
+async def good_detail(request: HttpRequest, good_id: int) -> JsonResponse:
+    """View для получения товара с ценами и остатками по местам расположения в JSON."""
+
+    try:
+        good = await Good.objects.values(
+            'id', 'code', 'name', 'description', 'type_id', type_name=F('type__name'), unit=F('unit__short_name'),
+        ).aget(pk=good_id)
+    except Good.DoesNotExist:
+        raise Http404('Good does not exist')
+
+    good['costs'] = [cost async for cost in GoodCost.objects.filter(good_id=good_id).values(
+        'cost', 'good_place_id', place=F('good_place__name'), currency=F('currency__short_name'),
+    )]
+    good['counts'] = [count async for count in GoodCount.objects.filter(good_id=good_id).values(
+        'count', 'good_place_id', place=F('good_place__name'),
+    )]
+    return JsonResponse(good)
+
+
+async def good_prices_as_of(request: HttpRequest, good_id: int) -> JsonResponse:
+    """View для получения цен товара в месте расположения на заданный момент в JSON."""
+
+    place = request.GET.get('place', '')
+    if not place.isdigit():
+        return JsonResponse({'error': 'place must be an id'}, status=400)
+    try:
+        moment = _moment(request.GET['at']) if 'at' in request.GET else timezone.now()
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    prices = await sync_to_async(prices_as_of)(good_id, int(place), moment)
+    return JsonResponse({'good_id': good_id, 'good_place_id': int(place), 'at': moment, 'prices': prices})
+
+
+async def good_price_history(request: HttpRequest, good_id: int) -> JsonResponse:
+    """View для постраничного (keyset) получения истории цен товара в JSON."""
+
+    place = request.GET.get('place')
+    if place is not None and not place.isdigit():
+        return JsonResponse({'error': 'place must be an id'}, status=400)
+    try:
+        start = _moment(request.GET['from']) if 'from' in request.GET else None
+        end = _moment(request.GET['to']) if 'to' in request.GET else None
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    queryset = price_series(good_id, int(place) if place is not None else None, start, end)
+    limit = _limit(request, PRICE_HISTORY_PAGE_SIZE, PRICE_HISTORY_MAX_PAGE_SIZE)
+    try:
+        rows, next_cursor = await akeyset_page(queryset, ('changed_at', 'id'), request.GET.get('cursor'), limit)
+    except InvalidCursor as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    return JsonResponse({'results': rows, 'next': next_cursor})
+
+
+async def nearest_places(request: HttpRequest, good_id: int) -> JsonResponse:
+    """View для поиска ближайших к точке мест, где товар есть в наличии, в JSON."""
+
+    try:
+        latitude = float(request.GET['lat'])
+        longitude = float(request.GET['lon'])
+        radius = float(request.GET.get('radius', NEAREST_RADIUS_KM))
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'lat and lon are required, lat, lon and radius must be numbers'}, status=400)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180 and 0 < radius <= NEAREST_MAX_RADIUS_KM):
+        return JsonResponse({'error': f'lat, lon must be coordinates, radius must be in (0, {NEAREST_MAX_RADIUS_KM}]'},
+                            status=400)
+
+    limit = _limit(request, NEAREST_PLACES_LIMIT, NEAREST_PLACES_MAX_LIMIT)
+    places = await sync_to_async(nearest_places_with_stock)(good_id, latitude, longitude, limit, radius)
+    return JsonResponse({'results': places})
+
+
+@staff_member_required
+def export_prices(request: HttpRequest) -> StreamingHttpResponse:
+    """View для выгрузки прайс-листа в CSV или JSONL без загрузки его целиком в память."""
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        raise Http404('Unknown export format')
+
+    if isinstance(request, ASGIRequest):
+        chunks = aexport_price_list(export_format)
+    else:
+        chunks = export_price_list(export_format)
+    response = StreamingHttpResponse(chunks, content_type=f'{EXPORT_FORMATS[export_format][1]}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="prices.{export_format}"'
+    return response
+
+
+@staff_member_required
+def contact_lookup(request: HttpRequest) -> JsonResponse:
+    """View для поиска контакта по номеру телефона или адресу электронной почты в JSON."""
+
+    phone_number = request.GET.get('phone')
+    email = request.GET.get('email')
+    if (phone_number is None) == (email is None):
+        return JsonResponse({'error': 'Either phone or email is required'}, status=400)
+
+    contact = find_contact(phone_number=phone_number, email=email)
+    if contact is None:
+        raise Http404('Contact does not exist')
+    return JsonResponse(contact)